@@ -1,16 +1,122 @@
-from pythonosc.dispatcher import Dispatcher
-from pythonosc.osc_server import BlockingOSCUDPServer
-import threading
+from osc_ingest import OSCIngest, by_address
+from ring_buffer import RingBuffer
+from session_recorder import SessionRecorder, recover, find_unclosed
+from session_export import export_recording, export_in_background
 import tkinter as tk
 from tkinter import font, messagebox
 import json
+import queue
+import threading
 from datetime import datetime
-from collections import deque
-import numpy as np
-from openpyxl import Workbook
-from openpyxl.styles import Font, PatternFill, Alignment
+from collections import namedtuple
 import os
 
+SESSIONS_DIR = "sessions"  # one recording directory per session, written while it runs
+EXPORT_FORMAT = "csv"  # session export on close: csv, xlsx (fast with xlsxwriter installed) or parquet
+EEG_COLUMNS = [('timestamp', 'f8'), ('attention', 'f4'), ('alpha', 'f4'), ('beta', 'f4')]
+ADAPTATION_COLUMNS = [('timestamp', 'f8'), ('elapsed_seconds', 'f8'), ('attention_before', 'f4'),
+                      ('attention_after', 'f4'), ('text_color', 'category'), ('status', 'category')]
+
+AttentionSnapshot = namedtuple('AttentionSnapshot', [
+    'seq', 'attention', 'prev_attention', 'avg_attention', 'memory_confidence',
+    'alpha_avg', 'beta_avg', 'n_attention', 'n_alpha', 'n_beta'])
+
+class AttentionTracker:
+    """
+    Attention pipeline off the Tk thread: OSC handlers put() band samples,
+    a compute thread updates attention and memory confidence with O(1)
+    ring-buffer statistics, and the GUI reads the latest immutable snapshot.
+    """
+
+    def __init__(self, recorder, band_window=15, history=100):
+        self.samples = queue.SimpleQueue()
+        self.alpha = RingBuffer(band_window)
+        self.beta = RingBuffer(band_window)
+        self.attention_history = RingBuffer(history)
+        self.recorder = recorder  # SessionRecorder with EEG_COLUMNS
+        self.attention = 0.5
+        self.prev_attention = 0.5
+        self.memory_confidence = 0.5
+        self.low_focus_start = None
+        self.seq = 0  # attention updates so far
+        self.snapshot = self._snapshot()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def put(self, band, value):
+        """Queue one 'alpha' or 'beta' sample (any thread)"""
+        self.samples.put((band, value))
+
+    def stop(self):
+        """Process the samples already queued, then stop (once OSC input has stopped)"""
+        self.samples.put(None)
+        self._thread.join()
+
+    def _run(self):
+        while True:
+            sample = self.samples.get()
+            # Drain whatever arrived meanwhile, then publish one snapshot for the lot
+            while sample is not None:
+                self._update(*sample)
+                try:
+                    sample = self.samples.get_nowait()
+                except queue.Empty:
+                    break
+            self.snapshot = self._snapshot()
+            if sample is None:
+                return
+
+    def _update(self, band, value):
+        """Calculate attention score from alpha/beta ratio"""
+        (self.alpha if band == 'alpha' else self.beta).append(value)
+        if len(self.alpha) < 5 or len(self.beta) < 5:
+            return
+        
+        alpha_avg = self.alpha.mean()
+        beta_avg = self.beta.mean()
+        
+        # Beta-dominant indicates focus; Alpha-dominant indicates relaxation
+        if beta_avg + alpha_avg > 0:
+            attention_score = beta_avg / (beta_avg + alpha_avg + 0.001)
+        else:
+            attention_score = 0.5
+        
+        self.prev_attention = self.attention
+        self.attention = attention_score
+        self.attention_history.append(attention_score)
+        self.seq += 1
+        
+        # Evaluate low-focus duration for penalty
+        now = datetime.now()
+        if attention_score < 0.40:
+            if self.low_focus_start is None:
+                self.low_focus_start = now
+        else:
+            self.low_focus_start = None
+        
+        # Compute average + stability (running sums, not a pass over the history)
+        avg_att = self.attention_history.mean()
+        std_att = self.attention_history.std()
+        
+        penalty = 1.0
+        if self.low_focus_start:
+            duration = (now - self.low_focus_start).total_seconds()
+            if duration > 3:
+                penalty = 0.7
+        
+        self.memory_confidence = max(0, min(1, avg_att * (1 - std_att) * penalty))
+        
+        self.recorder.append(now.timestamp(), attention_score, alpha_avg, beta_avg)
+
+    def _snapshot(self):
+        return AttentionSnapshot(
+            self.seq, self.attention, self.prev_attention,
+            self.attention_history.mean() if len(self.attention_history) else None,
+            self.memory_confidence,
+            self.alpha.mean() if len(self.alpha) else None,
+            self.beta.mean() if len(self.beta) else None,
+            len(self.attention_history), len(self.alpha), len(self.beta))
+
 class EEGAdaptiveReader:
     def __init__(self, root):
         self.root = root
@@ -18,12 +124,18 @@ class EEGAdaptiveReader:
         self.root.geometry("1400x900")
         self.root.configure(bg="#0a0e27")
         
-        # EEG Data Storage
-        self.alpha_buffer = deque(maxlen=15)
-        self.beta_buffer = deque(maxlen=15)
-        self.attention_history = deque(maxlen=100)
-        self.log_data = []
-        self.adaptation_events = []
+        # EEG Data Storage: computed off the Tk thread (see AttentionTracker) and
+        # recorded straight to disk, so memory stays flat and a crash loses <1s
+        self.session_start = datetime.now()
+        recovered = [(path, recover(path)) for path in find_unclosed(SESSIONS_DIR)]
+        self.session_dir = os.path.join(SESSIONS_DIR, self.session_start.strftime("%Y%m%d_%H%M%S"))
+        self.eeg_recorder = SessionRecorder(os.path.join(self.session_dir, "eeg"), EEG_COLUMNS)
+        self.adaptation_recorder = SessionRecorder(os.path.join(self.session_dir, "adaptations"),
+                                                   ADAPTATION_COLUMNS)
+        self.tracker = AttentionTracker(self.eeg_recorder)
+        self.last_seq = 0
+        self.export_future = None
+        self.export_progress = (0, 0)
         
         # State Variables
         self.current_attention = 0.5
@@ -34,12 +146,10 @@ class EEGAdaptiveReader:
         self.bg_color = "#0a0e27"
         self.focus_lower_threshold = 0.42
         self.focus_upper_threshold = 0.58
-        self.session_start = datetime.now()
         self.last_adaptation = None
         
         # Memory Confidence Score
         self.memory_confidence = 0.5
-        self.low_focus_start = None
         self.last_color_change = datetime.now()
         self.color_change_cooldown = 2.0  # seconds
         
@@ -53,6 +163,8 @@ living room, on the right to the dining room, and in the back to a hallway leadi
 """
         
         self.setup_ui()
+        for path, n_rows in recovered:
+            self.add_log(f"⚠ Recovered {n_rows} rows from unfinished session {path}")
         self.start_osc_server()
         self.update_metrics()
     
@@ -267,14 +379,8 @@ living room, on the right to the dining room, and in the back to a hallway leadi
             self.add_log(f"{status} - {attention_pct}% Attention")
             self.last_color_change = datetime.now()
             
-            self.adaptation_events.append({
-                "timestamp": datetime.now().isoformat(),
-                "elapsed_seconds": elapsed,
-                "attention_before": self.prev_attention,
-                "attention_after": self.current_attention,
-                "text_color": main_color,
-                "status": status
-            })
+            self.adaptation_recorder.append(datetime.now().timestamp(), elapsed, self.prev_attention,
+                                            self.current_attention, main_color, status)
     
     def add_log(self, message):
         """Add message to adaptation log"""
@@ -285,189 +391,82 @@ living room, on the right to the dining room, and in the back to a hallway leadi
         self.log_text.config(state=tk.DISABLED)
     
     def alpha_handler(self, address, *args):
-        """Handle alpha frequency data from Muse"""
+        """Handle alpha frequency data from Muse (OSC thread: enqueue only)"""
         try:
-            alpha_val = float(args[0])
-            self.alpha_buffer.append(alpha_val)
-            self.calculate_attention()
+            self.tracker.put('alpha', float(args[0]))
         except (IndexError, ValueError):
             pass
     
     def beta_handler(self, address, *args):
-        """Handle beta frequency data from Muse"""
+        """Handle beta frequency data from Muse (OSC thread: enqueue only)"""
         try:
-            beta_val = float(args[0])
-            self.beta_buffer.append(beta_val)
-            self.calculate_attention()
+            self.tracker.put('beta', float(args[0]))
         except (IndexError, ValueError):
             pass
     
-    def calculate_attention(self):
-        """Calculate attention score from alpha/beta ratio"""
-        if len(self.alpha_buffer) < 5 or len(self.beta_buffer) < 5:
-            return
-        
-        alpha_avg = np.mean(list(self.alpha_buffer))
-        beta_avg = np.mean(list(self.beta_buffer))
-        
-        # Beta-dominant indicates focus; Alpha-dominant indicates relaxation
-        if beta_avg + alpha_avg > 0:
-            attention_score = beta_avg / (beta_avg + alpha_avg + 0.001)
-        else:
-            attention_score = 0.5
-        
-        self.prev_attention = self.current_attention
-        self.current_attention = attention_score
-        self.attention_history.append(attention_score)
-        
-        # Evaluate low-focus duration for penalty
-        if self.current_attention < 0.40:
-            if self.low_focus_start is None:
-                self.low_focus_start = datetime.now()
-        else:
-            self.low_focus_start = None
-        
-        # Compute average + stability
-        att_list = list(self.attention_history)
-        avg_att = np.mean(att_list)
-        std_att = np.std(att_list)
-        
-        penalty = 1.0
-        if self.low_focus_start:
-            duration = (datetime.now() - self.low_focus_start).total_seconds()
-            if duration > 3:
-                penalty = 0.7
-        
-        self.memory_confidence = max(0, min(1, avg_att * (1 - std_att) * penalty))
-        
-        # Trigger adaptation
-        self.adapt_reading_interface()
-        
-        self.log_data.append({
-            "timestamp": datetime.now().isoformat(),
-            "attention": attention_score,
-            "alpha": alpha_avg,
-            "beta": beta_avg
-        })
-    
     def start_osc_server(self):
-        """Start OSC server in background thread"""
-        disp = Dispatcher()
-        disp.map("/muse/elements/alpha_absolute", self.alpha_handler)
-        disp.map("/muse/elements/beta_absolute", self.beta_handler)
-        
-        server = BlockingOSCUDPServer(("0.0.0.0", 9001), disp)
-        
-        def run_server():
-            try:
-                server.serve_forever()
-            except:
-                pass
-        
-        thread = threading.Thread(target=run_server, daemon=True)
-        thread.start()
+        """Start batched OSC ingest on a background thread"""
+        self.osc_ingest = OSCIngest()
+        self.osc_ingest.listen(9001, by_address({
+            "/muse/elements/alpha_absolute": self.alpha_handler,
+            "/muse/elements/beta_absolute": self.beta_handler,
+        }))
+        self.osc_ingest.start()
         
         self.add_log("✓ OSC Server started on 0.0.0.0:9001")
     
-    def save_session_data(self):
-        """Save session data to Excel files"""
+    def save_session_data(self, progress=None):
+        """Close the session recordings and export them as EXPORT_FORMAT files (blocking)"""
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        
-        # Save raw EEG data
-        if self.log_data:
-            eeg_file = f"eeg_data_{timestamp}.xlsx"
-            try:
-                wb = Workbook()
-                ws = wb.active
-                ws.title = "EEG Data"
-                
-                # Headers
-                headers = ["Timestamp", "Attention", "Alpha", "Beta"]
-                ws.append(headers)
-                header_fill = PatternFill(start_color="4472C4", end_color="4472C4", fill_type="solid")
-                header_font = Font(bold=True, color="FFFFFF")
-                
-                for cell in ws[1]:
-                    cell.fill = header_fill
-                    cell.font = header_font
-                    cell.alignment = Alignment(horizontal="center")
-                
-                # Data rows
-                for entry in self.log_data:
-                    ws.append([entry["timestamp"], entry["attention"], entry["alpha"], entry["beta"]])
-                
-                # Auto-adjust column widths
-                ws.column_dimensions['A'].width = 25
-                ws.column_dimensions['B'].width = 12
-                ws.column_dimensions['C'].width = 12
-                ws.column_dimensions['D'].width = 12
-                
-                wb.save(eeg_file)
-                print(f"✓ Saved {len(self.log_data)} EEG data points to {eeg_file}")
-            except Exception as e:
-                print(f"Error saving EEG data: {e}")
-        else:
-            print("⚠ No EEG data collected yet")
-        
-        # Save adaptations
-        if self.adaptation_events:
-            adaptations_file = f"eeg_adaptations_{timestamp}.xlsx"
+        self.eeg_recorder.close()
+        self.adaptation_recorder.close()
+        exports = [
+            (self.eeg_recorder, f"eeg_data_{timestamp}.{EXPORT_FORMAT}", "EEG data points", dict(
+                title="EEG Data", headers=["Timestamp", "Attention", "Alpha", "Beta"],
+                header_color="4472C4", widths=[25, 12, 12, 12])),
+            (self.adaptation_recorder, f"eeg_adaptations_{timestamp}.{EXPORT_FORMAT}", "adaptations", dict(
+                title="Adaptations", headers=["Timestamp", "Elapsed Seconds", "Attention Before",
+                                              "Attention After", "Text Color", "Status"],
+                header_color="70AD47", widths=[25, 16, 18, 18, 12, 15])),
+        ]
+        for recorder, file, what, options in exports:
+            if not len(recorder):
+                print(f"⚠ No {what} recorded yet")
+                continue
             try:
-                wb = Workbook()
-                ws = wb.active
-                ws.title = "Adaptations"
-                
-                # Headers
-                headers = ["Timestamp", "Elapsed Seconds", "Attention Before", "Attention After", "Text Color", "Status"]
-                ws.append(headers)
-                header_fill = PatternFill(start_color="70AD47", end_color="70AD47", fill_type="solid")
-                header_font = Font(bold=True, color="FFFFFF")
-                
-                for cell in ws[1]:
-                    cell.fill = header_fill
-                    cell.font = header_font
-                    cell.alignment = Alignment(horizontal="center")
-                
-                # Data rows
-                for entry in self.adaptation_events:
-                    ws.append([entry["timestamp"], entry["elapsed_seconds"], 
-                             entry["attention_before"], entry["attention_after"],
-                             entry["text_color"], entry["status"]])
-                
-                # Auto-adjust column widths
-                ws.column_dimensions['A'].width = 25
-                ws.column_dimensions['B'].width = 16
-                ws.column_dimensions['C'].width = 18
-                ws.column_dimensions['D'].width = 18
-                ws.column_dimensions['E'].width = 12
-                ws.column_dimensions['F'].width = 15
-                
-                wb.save(adaptations_file)
-                print(f"✓ Saved {len(self.adaptation_events)} adaptations to {adaptations_file}")
+                export_recording(recorder.path, file, progress=progress, **options)
+                print(f"✓ Saved {len(recorder)} {what} to {file}")
             except Exception as e:
-                print(f"Error saving adaptations: {e}")
-        else:
-            print("⚠ No adaptation events recorded yet")
+                print(f"Error saving {what}: {e}")
     
     def update_metrics(self):
-        """Update UI metrics every 100ms"""
+        """Pull the latest attention snapshot, adapt, and update UI metrics every 100ms"""
+        snap = self.tracker.snapshot
+        self.current_attention = snap.attention
+        self.prev_attention = snap.prev_attention
+        self.memory_confidence = snap.memory_confidence
+        if snap.seq != self.last_seq and self.export_future is None:
+            # Widgets are only touched here, on the Tk thread; no adapting once saving
+            self.last_seq = snap.seq
+            self.adapt_reading_interface()
+        
         elapsed = (datetime.now() - self.session_start).total_seconds()
         self.time_label.config(text=f"Time: {int(elapsed)}s")
-        self.data_points_label.config(text=f"Data Points: {len(self.attention_history)}")
-        self.focus_events_label.config(text=f"Color Adaptations: {len(self.adaptation_events)}")
+        self.data_points_label.config(text=f"Data Points: {snap.n_attention}")
+        self.focus_events_label.config(text=f"Color Adaptations: {len(self.adaptation_recorder)}")
         
-        if len(self.attention_history) > 0:
-            avg_attention = np.mean(list(self.attention_history))
-            self.avg_attention_label.config(text=f"Avg Attention: {int(avg_attention * 100)}%")
+        if snap.avg_attention is not None:
+            self.avg_attention_label.config(text=f"Avg Attention: {int(snap.avg_attention * 100)}%")
         
         self.memory_label.config(text=f"🧠 Memory Confidence: {int(self.memory_confidence * 100)}%")
         
-        if len(self.alpha_buffer) > 0:
-            self.alpha_label.config(text=f"{np.mean(list(self.alpha_buffer)):.2f}")
-            self.status_indicator.config(text="● Data Streaming", fg="#81c784")
+        if snap.alpha_avg is not None:
+            self.alpha_label.config(text=f"{snap.alpha_avg:.2f}")
+            if self.export_future is None:
+                self.status_indicator.config(text="● Data Streaming", fg="#81c784")
         
-        if len(self.beta_buffer) > 0:
-            self.beta_label.config(text=f"{np.mean(list(self.beta_buffer)):.2f}")
+        if snap.beta_avg is not None:
+            self.beta_label.config(text=f"{snap.beta_avg:.2f}")
         
         self.focus_label.config(text=f"{int(self.current_attention * 100)}%")
         self.draw_attention_gauge()
@@ -480,9 +479,28 @@ living room, on the right to the dining room, and in the back to a hallway leadi
         self.root.after(100, self.update_metrics)
     
     def on_closing(self):
-        """Handle window close event"""
-        self.save_session_data()
-        self.root.destroy()
+        """Handle window close event: export in the background, close when done"""
+        if self.export_future is not None:
+            return  # already saving
+        self.status_indicator.config(text="● Saving session...", fg="#ffa726")
+        # Nothing may append to the recorders once they are closed for export
+        self.osc_ingest.stop()
+        self.tracker.stop()
+        self.export_future = export_in_background(self.save_session_data, self.on_export_progress)
+        self.poll_export()
+    
+    def on_export_progress(self, done, total):
+        """Export worker thread: only record progress; poll_export shows it"""
+        self.export_progress = (done, total)
+    
+    def poll_export(self):
+        if self.export_future.done():
+            self.root.destroy()
+            return
+        done, total = self.export_progress
+        if total:
+            self.status_indicator.config(text=f"● Saving session... {100 * done // total}%")
+        self.root.after(100, self.poll_export)
 
 if __name__ == "__main__":
     root = tk.Tk()
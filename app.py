@@ -1,12 +1,17 @@
 import threading
+import queue
 import time
 import numpy as np
-import pandas as pd
-from flask import Flask, render_template, jsonify, request
-from pythonosc import dispatcher, osc_server
-from collections import deque
+from flask import Flask, Response, abort, render_template, jsonify, request
+import io
 import os 
 import json
+import argparse
+from concurrent.futures import Future
+
+from ring_buffer import RingBuffer, GrowableArray
+from osc_ingest import OSCIngest
+from session_store import SessionStore, DB_FILE, GROUP_BY
 
 # ==============================================================================
 # CONFIGURATION
@@ -15,44 +20,238 @@ OSC_IP, OSC_PORT = "0.0.0.0", 5000
 WEB_PORT = 5001      
 WINDOW_SIZE = 10     
 SMOOTHING_FACTOR = 0.3 
-SAVE_DIR = r"C:\Users\meeta\OneDrive\Desktop\EEFISEF\muse_project"
-FULL_SAVE_FILE_PATH = os.path.join(SAVE_DIR, "session_results.csv")
+STATUS_TICK_SEC = 1.0  # server clock for smoothing/interventions and status pushes
+MUSE_EEG_RATE = 256  # Hz of raw /muse/eeg samples (model mode)
+MUSE_EEG_CHANNELS = 4  # values per /muse/eeg message (TP9, AF7, AF8, TP10)
+# Saved session results (session_store.py); override with EEG_SAVE_DIR or --save-dir
+SAVE_DIR = os.environ.get("EEG_SAVE_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), "results"))
+
+DEFAULT_SESSION = "default"  # session for unscoped routes and un-prefixed OSC addresses
+MAX_SESSIONS = 64
+BANDS = ['alpha', 'beta', 'theta', 'gamma']
+HISTORY_KEYS = ['h_alpha', 'h_beta', 'h_theta', 'h_gamma', 'h_focus']
+
+class ModelMonitor:
+    """
+    Optional model-driven focus: raw /muse/eeg samples go into a ring buffer
+    and every hop (pipeline step_size samples) the latest window is classified
+    by a model from train_ml_model.py on a separate thread, so the OSC receive
+    path only copies one sample.
+    """
+
+    def __init__(self, predictor, input_rate=MUSE_EEG_RATE):
+        pipeline = predictor.pipeline
+        self.predictor = predictor
+        self.n_channels = pipeline.n_channels
+        self.window_size = pipeline.window_size
+        self.hop = pipeline.step_size
+        # Muse streams faster than the training data; average blocks of samples down to its rate
+        self.decimate = max(1, round(input_rate / pipeline.sampling_rate))
+        self.buffer = RingBuffer(self.window_size, self.n_channels)
+        self._block = np.zeros(self.n_channels)
+        self._block_count = 0
+        self._lock = threading.Lock()
+        self._ready = threading.Event()
+        self.probability = None
+        threading.Thread(target=self._run, daemon=True).start()
+
+    def push(self, values):
+        """Add one raw sample (first n_channels values are used)"""
+        if len(values) < self.n_channels: return
+        with self._lock:
+            self._block += values[:self.n_channels]
+            self._block_count += 1
+            if self._block_count < self.decimate: return
+            self.buffer.append(self._block / self._block_count)
+            self._block[:] = 0
+            self._block_count = 0
+            if self.buffer.full and self.buffer.count % self.hop == 0:
+                self._ready.set()
+
+    def latest_window(self):
+        with self._lock:
+            return self.buffer.values()
+
+    def _run(self):
+        while True:
+            self._ready.wait()
+            self._ready.clear()
+            try:
+                self.probability = float(self.predictor.focus_probability(self.latest_window()[None])[0])
+            except Exception as e:
+                print(f"⚠ Model prediction failed: {e}")
 
 # ==============================================================================
-# GLOBAL STATE
+# SESSIONS (one per participant / headset)
 # ==============================================================================
-data_store = {
-    'alpha': deque(maxlen=WINDOW_SIZE), 'beta': deque(maxlen=WINDOW_SIZE), 
-    'theta': deque(maxlen=WINDOW_SIZE), 'gamma': deque(maxlen=WINDOW_SIZE),
-    'h_alpha': [], 'h_beta': [], 'h_theta': [], 'h_gamma': [], 'h_focus': []
-}
-
-session_state = {
-    'phase': 'IDLE', 'group': 'test', 'calibration_data': [], 'personal_threshold': 0.5, 
-    'interventions': 0, 'smoothed_focus': 0.0, 'low_focus_duration': 0, 'intervention_hold_time': 0
-}
-
-def calculate_focus_score():
-    if not data_store['alpha'] or len(data_store['alpha']) < WINDOW_SIZE: return 0 
-    a, t, b, g = [np.mean(data_store[k]) for k in ['alpha', 'theta', 'beta', 'gamma']]
+class Session:
+    """Buffers, thresholds and intervention state for one participant/headset"""
+
+    def __init__(self, session_id, predictor=None):
+        self.id = session_id
+        self.data = {b: RingBuffer(WINDOW_SIZE) for b in BANDS}
+        self.data.update({k: GrowableArray() for k in HISTORY_KEYS})
+        self.state = {
+            'phase': 'IDLE', 'group': 'test', 'calibration_data': [], 'personal_threshold': 0.5, 
+            'interventions': 0, 'smoothed_focus': 0.0, 'low_focus_duration': 0, 'intervention_hold_time': 0
+        }
+        self.samples = dict.fromkeys(BANDS, 0)  # band values ingested since start (never reset)
+        self.broadcaster = StatusBroadcaster()
+        self.model_monitor = ModelMonitor(predictor) if predictor else None
+
+class Ingestor:
+    """
+    Single writer for all session state. The OSC receive thread only parses
+    and enqueues; HTTP requests and the status clock run their mutations here via
+    call(). Nothing else writes buffers or state, so no locks are needed and
+    readers get consistent snapshots from call() or published statuses.
+    """
+
+    def __init__(self):
+        self.queue = queue.SimpleQueue()
+        threading.Thread(target=self._run, daemon=True).start()
+
+    def put(self, func, *args):
+        """Run func(*args) on the writer thread without waiting"""
+        self.queue.put((func, args, None))
+
+    def call(self, func, *args):
+        """Run func(*args) on the writer thread and return its result"""
+        future = Future()
+        self.queue.put((func, args, future))
+        return future.result()
+
+    def _run(self):
+        while True:
+            func, args, future = self.queue.get()
+            try:
+                result = func(*args)
+            except Exception as e:
+                if future is None: print(f"⚠ Ingest failed: {e}")
+                else: future.set_exception(e)
+                continue
+            if future is not None: future.set_result(result)
+
+ingestor = Ingestor()
+
+class SessionManager:
+    """
+    Creates sessions on an explicit start, or on first use for configured ids
+    (the default session, --device and --session ids), so stray requests or
+    OSC prefixes can't use up max_sessions. Lookups of existing sessions take no lock.
+    """
+
+    def __init__(self, max_sessions=MAX_SESSIONS):
+        self.sessions = {}
+        self.max_sessions = max_sessions
+        self.configured = {DEFAULT_SESSION}
+        self.predictor = None  # set in model mode; shared by every session's ModelMonitor
+        self._lock = threading.Lock()
+
+    def get(self, session_id, create=False):
+        """
+        Session for session_id, or None if it doesn't exist and isn't
+        configured (without create) or max_sessions exist
+        """
+        session = self.sessions.get(session_id)
+        if session is None and (create or session_id in self.configured):
+            with self._lock:
+                session = self.sessions.get(session_id)
+                if session is None and len(self.sessions) < self.max_sessions:
+                    session = self.sessions[session_id] = Session(session_id, self.predictor)
+        return session
+
+    def full(self):
+        return len(self.sessions) >= self.max_sessions
+
+    def all(self):
+        return list(self.sessions.values())
+
+sessions = SessionManager()
+
+def calculate_focus_score(session):
+    data = session.data
+    if not data['alpha'].full: return 0 
+    a, t, b, g = [data[k].mean() for k in ['alpha', 'theta', 'beta', 'gamma']]
     total = a + t + b + g
     # Focus Score uses all 4 bands for stability and depth
     return ((b + g) / total) / ((a + t) / total) if total != 0 else 0
 
-def osc_handler(address, *args):
-    val = np.mean([x for x in args if not np.isnan(x)])
-    key = address.split('/')[-1].split('_')[0]
-    if key in data_store: 
-        data_store[key].append(val)
-        if session_state['phase'] == 'CALIBRATING' and key == 'alpha':
-            session_state['calibration_data'].append(calculate_focus_score())
-        if session_state['phase'] == 'READING':
-            data_store[f'h_{key}'].append(val)
-            if key == 'alpha':
-                data_store['h_focus'].append(calculate_focus_score())
+def band_handler(session, key, val):
+    """Apply one band value (writer thread only)"""
+    data, state = session.data, session.state
+    data[key].append(val)
+    session.samples[key] += 1
+    if state['phase'] == 'CALIBRATING' and key == 'alpha':
+        state['calibration_data'].append(calculate_focus_score(session))
+    if state['phase'] == 'READING':
+        data[f'h_{key}'].append(val)
+        if key == 'alpha':
+            data['h_focus'].append(calculate_focus_score(session))
+
+def apply_band_values(values):
+    """Apply a received burst of (session, key, value) band values (writer thread only)"""
+    for session, key, val in values:
+        band_handler(session, key, val)
+
+def snapshot(session):
+    """Consistent copy of a session's counters (writer thread only)"""
+    return {
+        'phase': session.state['phase'],
+        'samples': dict(session.samples),
+        'history': {k: len(session.data[k]) for k in HISTORY_KEYS},
+    }
+
+def make_osc_handler(default_session_id):
+    """
+    Batch OSC handler for one listening port. /muse/... addresses belong to
+    the port's session; /<session_id>/muse/... addresses are routed by prefix,
+    so several headsets can share one port. Unknown prefixes (neither started
+    nor configured) are ignored. Band values of a whole burst go to the ingest
+    thread as one queue item.
+    """
+    def handle(messages):
+        values = []
+        for address, args in messages:
+            parts = address.split('/')[1:]
+            if parts and parts[0] != 'muse':
+                session_id, parts = parts[0], parts[1:]
+            else:
+                session_id = default_session_id
+            if len(parts) < 2 or parts[0] != 'muse': continue
+            session = sessions.get(session_id)
+            if session is None: continue
+
+            if parts[1] == 'eeg':
+                if session.model_monitor: session.model_monitor.push(np.asarray(args, dtype=float))
+            elif len(parts) == 3 and parts[1] == 'elements' and parts[2].endswith('_absolute'):
+                key = parts[2].split('_')[0]
+                if key in BANDS:
+                    finite = [x for x in args if x == x]  # drop NaNs (plain Python: this runs per message)
+                    values.append((session, key, sum(finite) / len(finite) if finite else float('nan')))
+        if values:
+            ingestor.put(apply_band_values, values)
+    return handle
 
 app = Flask(__name__)
 
+def session_route(rule, **options):
+    """Register a view for the default session at rule and for any session at /sessions/<id>rule"""
+    def decorator(view):
+        app.add_url_rule(rule, view.__name__, view, defaults={'session_id': DEFAULT_SESSION}, **options)
+        app.add_url_rule(f'/sessions/<session_id>{rule}', f'{view.__name__}_scoped', view, **options)
+        return view
+    return decorator
+
+def get_session_or_404(session_id, create=False):
+    """Existing (or configured) session; create=True for the routes that start a session"""
+    session = sessions.get(session_id, create)
+    if session is None:
+        if sessions.full():
+            abort(404, description=f"Too many sessions (max {MAX_SESSIONS})")
+        abort(404, description=f"Unknown session '{session_id}'")
+    return session
+
 @app.route('/')
 def index(): return render_template('index.html')
 
@@ -63,31 +262,48 @@ def get_content(sid):
         data = json.load(f)
         return jsonify(data.get(str(sid), {}))
 
-@app.route('/start_calibration', methods=['POST'])
-def start_calib():
-    session_state['phase'], session_state['calibration_data'] = 'CALIBRATING', []
-    return jsonify({"status": "Started"})
+@app.route('/sessions')
+def list_sessions():
+    return jsonify(ingestor.call(lambda: {s.id: snapshot(s) for s in sessions.all()}))
 
-@app.route('/end_calibration', methods=['POST'])
-def end_calib():
+# Handlers below mutate session state, so routes run them on the ingest thread
+def start_calibration(session):
+    session.state['phase'], session.state['calibration_data'] = 'CALIBRATING', []
+
+def end_calibration(session):
+    session_state = session.state
     session_state['phase'] = 'IDLE'
     if session_state['calibration_data']:
         mean_v = np.mean(session_state['calibration_data'])
         session_state['personal_threshold'] = max(mean_v - (0.15 * np.std(session_state['calibration_data'])), 0.1)
-    return jsonify({"threshold": round(session_state['personal_threshold'], 3)})
+    return session_state['personal_threshold']
+
+def begin_reading(session, group):
+    session.state['phase'] = 'READING'
+    session.state['group'] = group
+    session.state['interventions'] = 0
+    for k in HISTORY_KEYS: session.data[k].clear()
+
+@session_route('/start_calibration', methods=['POST'])
+def start_calib(session_id):
+    ingestor.call(start_calibration, get_session_or_404(session_id, create=True))
+    return jsonify({"status": "Started"})
 
-@app.route('/start_reading', methods=['POST'])
-def start_reading():
+@session_route('/end_calibration', methods=['POST'])
+def end_calib(session_id):
+    threshold = ingestor.call(end_calibration, get_session_or_404(session_id))
+    return jsonify({"threshold": round(threshold, 3)})
+
+@session_route('/start_reading', methods=['POST'])
+def start_reading(session_id):
     d = request.json
-    session_state['phase'] = 'READING'
-    session_state['group'] = d.get('group', 'test')
-    session_state['interventions'] = 0
-    for k in ['h_alpha', 'h_beta', 'h_theta', 'h_gamma', 'h_focus']: data_store[k] = []
+    ingestor.call(begin_reading, get_session_or_404(session_id, create=True), d.get('group', 'test'))
     return jsonify({"status": "Started"})
 
-@app.route('/get_status')
-def get_status():
-    raw = calculate_focus_score()
+def tick_status(session):
+    """Advance EMA smoothing and the intervention state machine by one tick (writer thread only)"""
+    session_state = session.state
+    raw = calculate_focus_score(session)
     session_state['smoothed_focus'] = (SMOOTHING_FACTOR * raw) + ((1 - SMOOTHING_FACTOR) * session_state['smoothed_focus'])
     f, t = session_state['smoothed_focus'], session_state['personal_threshold']
     intervene, audio = False, False
@@ -106,44 +322,198 @@ def get_status():
             intervene = True
             session_state['intervention_hold_time'] -= 1
             
-    return jsonify({
-        "focus": round(f, 3), 
-        "threshold": round(t, 3), 
+    return current_status(session, intervene, audio)
+
+def current_status(session, intervene=False, audio=False):
+    """Status from the session state as it is, without ticking (writer thread only)"""
+    session_state = session.state
+    model_focus = session.model_monitor.probability if session.model_monitor else None
+    return {
+        "focus": round(session_state['smoothed_focus'], 3), 
+        "threshold": round(session_state['personal_threshold'], 3), 
         "intervene": intervene, 
         "play_audio": audio, 
-        "intervention_count": session_state['interventions']
-    })
+        "intervention_count": session_state['interventions'],
+        "model_focus": round(model_focus, 3) if model_focus is not None else None
+    }
+
+class StatusBroadcaster:
+    """
+    Pushes each of a session's ticked statuses to every subscriber, so
+    interventions no longer depend on how often (or how many) browser tabs poll.
+    """
+
+    def __init__(self):
+        self.latest = None
+        self.subscribers = set()
+        self._lock = threading.Lock()
+
+    def subscribe(self):
+        q = queue.Queue(maxsize=10)
+        with self._lock: self.subscribers.add(q)
+        return q
+
+    def unsubscribe(self, q):
+        with self._lock: self.subscribers.discard(q)
+
+    def publish(self, status):
+        self.latest = status
+        with self._lock: subscribers = list(self.subscribers)
+        for q in subscribers:
+            if q.full():  # slow client: drop its oldest update rather than block the clock
+                try: q.get_nowait()
+                except queue.Empty: pass
+            q.put_nowait(status)
+
+def tick_all():
+    return [(session, tick_status(session)) for session in sessions.all()]
+
+def run_status_clock(interval=STATUS_TICK_SEC):
+    """One clock for all sessions: tick each on the writer thread and push its status"""
+    next_tick = time.monotonic()
+    while True:
+        for session, status in ingestor.call(tick_all):
+            session.broadcaster.publish(status)
+        next_tick += interval
+        time.sleep(max(0.0, next_tick - time.monotonic()))
+
+@session_route('/get_status')
+def get_status(session_id):
+    # Latest pushed status (or the untouched state before the first tick);
+    # polling never advances the smoothing/intervention clock
+    session = get_session_or_404(session_id)
+    return jsonify(session.broadcaster.latest or ingestor.call(current_status, session))
 
-@app.route('/save_session', methods=['POST'])
-def save():
+@session_route('/status_stream')
+def status_stream(session_id):
+    """Server-Sent Events: one JSON status per tick"""
+    broadcaster = get_session_or_404(session_id).broadcaster
+    def stream(q):
+        try:
+            while True:
+                yield f"data: {json.dumps(q.get())}\n\n"
+        finally:
+            broadcaster.unsubscribe(q)
+    return Response(stream(broadcaster.subscribe()), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+def session_summary(session):
+    """Averages, counters and float32 copies of the h_* histories for save_session (writer thread only)"""
+    data_store, session_state = session.data, session.state
+    series = {k: data_store[k].to_array().astype(np.float32) for k in HISTORY_KEYS}
+    return series, {
+        'Avg_Focus': round(data_store['h_focus'].mean(), 4) if len(data_store['h_focus']) else 0,
+        'Avg_Alpha': round(data_store['h_alpha'].mean(), 4) if len(data_store['h_alpha']) else 0,
+        'Avg_Beta': round(data_store['h_beta'].mean(), 4) if len(data_store['h_beta']) else 0,
+        'Avg_Theta': round(data_store['h_theta'].mean(), 4) if len(data_store['h_theta']) else 0,
+        'Avg_Gamma': round(data_store['h_gamma'].mean(), 4) if len(data_store['h_gamma']) else 0,
+        'Threshold': session_state['personal_threshold'], 
+        'Interventions': session_state['interventions'],
+    }
+
+_store = None
+_store_lock = threading.Lock()
+
+def get_store():
+    """The session result store under SAVE_DIR, opened on first use"""
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = SessionStore(os.path.join(SAVE_DIR, DB_FILE))
+        return _store
+
+@session_route('/save_session', methods=['POST'])
+def save(session_id):
     d = request.json
-    if not os.path.exists(SAVE_DIR): os.makedirs(SAVE_DIR)
+    series, summary = ingestor.call(session_summary, get_session_or_404(session_id))
     row = {
         'User_ID': d.get('user_id'), 
         'Group': d.get('group'),
         'Session': d.get('session_id'), 
         'Date': time.strftime("%Y-%m-%d %H:%M:%S"),
         'Read_Time_Sec': d.get('reading_duration'), 
-        'Avg_Focus': round(np.mean(data_store['h_focus']), 4) if data_store['h_focus'] else 0,
-        'Avg_Alpha': round(np.mean(data_store['h_alpha']), 4) if data_store['h_alpha'] else 0,
-        'Avg_Beta': round(np.mean(data_store['h_beta']), 4) if data_store['h_beta'] else 0,
-        'Avg_Theta': round(np.mean(data_store['h_theta']), 4) if data_store['h_theta'] else 0,
-        'Avg_Gamma': round(np.mean(data_store['h_gamma']), 4) if data_store['h_gamma'] else 0,
-        'Threshold': session_state['personal_threshold'], 
-        'Interventions': session_state['interventions'],
+        **summary,
         'Quiz_Score': d.get('quiz_score'), 
         'Memory_Score': d.get('memory_score'), 
         'Memory_Errors': d.get('memory_errors')
     }
-    df = pd.DataFrame([row])
-    df.to_csv(FULL_SAVE_FILE_PATH, mode='a', header=not os.path.exists(FULL_SAVE_FILE_PATH), index=False)
-    return jsonify({"status": "Saved"})
+    result_id = get_store().save(row, series, device_session=session_id)
+    return jsonify({"status": "Saved", "id": result_id})
+
+def result_filters():
+    return {'user_id': request.args.get('user_id'), 'group': request.args.get('group'),
+            'session': request.args.get('session')}
+
+@app.route('/results')
+def list_results():
+    """Saved results, filtered by ?user_id=&group=&session="""
+    df = get_store().results(**result_filters())
+    return Response(df.to_json(orient='records'), mimetype='application/json')
+
+@app.route('/results/summary')
+def results_summary():
+    """Count and means per ?by=user|group|session (same filters as /results)"""
+    by = request.args.get('by', 'group')
+    if by not in GROUP_BY: abort(400, f"by must be one of {', '.join(GROUP_BY)}")
+    df = get_store().aggregate(by, **result_filters())
+    return Response(df.to_json(orient='records'), mimetype='application/json')
+
+@app.route('/results.csv')
+def export_results():
+    """Saved results in the legacy session_results.csv layout"""
+    buffer = io.StringIO()
+    get_store().export_csv(buffer, **result_filters())
+    return Response(buffer.getvalue(), mimetype='text/csv',
+                    headers={'Content-Disposition': 'attachment; filename=session_results.csv'})
+
+@app.route('/results/<int:result_id>/series')
+def result_series(result_id):
+    """Per-sample h_* histories saved with a result"""
+    series = get_store().series(result_id)
+    if not series: abort(404)
+    return jsonify({k: v.tolist() for k, v in series.items()})
 
-def start_osc():
-    disp = dispatcher.Dispatcher()
-    for b in ['alpha', 'beta', 'theta', 'gamma']: disp.map(f"/muse/elements/{b}_absolute", osc_handler)
-    osc_server.ThreadingOSCUDPServer((OSC_IP, OSC_PORT), disp).serve_forever()
+def start_osc(ports, ip=OSC_IP):
+    """Receive every (port, session_id) on one batched OSC ingest thread"""
+    osc = OSCIngest()
+    for port, session_id in ports:
+        osc.listen(port, make_osc_handler(session_id), ip)
+    return osc.start()
 
 if __name__ == '__main__':
-    threading.Thread(target=start_osc, daemon=True).start()
+    parser = argparse.ArgumentParser(description="EEG adaptive reading server")
+    parser.add_argument("--model", help="also classify raw /muse/eeg with a trained model "
+                                        "(name from models/, or 'latest')")
+    parser.add_argument("--eeg-channels", type=int, default=MUSE_EEG_CHANNELS,
+                        help="values per /muse/eeg message (more with AUX channels; default: %(default)s)")
+    parser.add_argument("--device", action="append", default=[], metavar="SESSION_ID:PORT",
+                        help="extra OSC port whose un-prefixed messages go to SESSION_ID (repeatable)")
+    parser.add_argument("--session", action="append", default=[], metavar="SESSION_ID",
+                        help="session accepted as an OSC /SESSION_ID/muse/... prefix before "
+                             "it is started over HTTP (repeatable)")
+    parser.add_argument("--save-dir", default=SAVE_DIR, help=f"directory for {DB_FILE} (default: %(default)s)")
+    args = parser.parse_args()
+    SAVE_DIR = args.save_dir
+    if args.model:
+        from eeg_predict import EEGPredictor
+        sessions.predictor = EEGPredictor(None if args.model == 'latest' else args.model)
+        if sessions.predictor.pipeline.n_channels > args.eeg_channels:
+            # ModelMonitor.push would drop every sample
+            parser.error(f"model '{sessions.predictor.model_name}' needs "
+                         f"{sessions.predictor.pipeline.n_channels} EEG channels but /muse/eeg has "
+                         f"{args.eeg_channels} (see --eeg-channels)")
+        print(f"✓ Model mode: '{sessions.predictor.model_name}' on "
+              f"{sessions.predictor.pipeline.n_channels}-channel /muse/eeg")
+    sessions.get(DEFAULT_SESSION)
+    ports = [(OSC_PORT, DEFAULT_SESSION)]
+    for device in args.device:
+        session_id, port = device.rsplit(':', 1)
+        ports.append((int(port), session_id))
+    sessions.configured.update(session_id for _, session_id in ports)
+    sessions.configured.update(args.session)
+    start_osc(ports)
+    for port, session_id in ports:
+        print(f"OSC port {port} -> session '{session_id}' (or /<session_id>/muse/... prefixes "
+              f"of started or --session sessions)")
+    threading.Thread(target=run_status_clock, daemon=True).start()
     app.run(debug=False, port=WEB_PORT, threaded=True)
\ No newline at end of file
@@ -0,0 +1,119 @@
+"""
+Benchmark: OSC ingest throughput and drop rate
+- A generator process sends Muse-shaped band packets over local UDP at a
+  fixed offered rate (or flat out with rate 0)
+- Each receiver counts the messages its handler saw:
+    threading  pythonosc ThreadingOSCUDPServer + per-message NumPy NaN mean (old app.py)
+    blocking   pythonosc BlockingOSCUDPServer + same handler (old relay / Tk reader)
+    batched    osc_ingest.OSCIngest + plain-Python mean per burst (current app.py)
+- Reports sustained messages/second and the fraction of sent packets lost
+"""
+
+import sys
+import time
+import socket
+import threading
+import multiprocessing as mp
+import numpy as np
+from pythonosc import dispatcher, osc_server
+from pythonosc.osc_message_builder import OscMessageBuilder
+
+from osc_ingest import OSCIngest
+
+DURATION = 3.0  # seconds of sending per run
+RATES = [2000, 10000, 40000, 0]  # offered packets/s (0: as fast as the generator can)
+BANDS = ['alpha', 'beta', 'theta', 'gamma']
+
+def packets():
+    out = []
+    for band in BANDS:
+        builder = OscMessageBuilder(f"/muse/elements/{band}_absolute")
+        for v in (0.5, 0.6, float('nan'), 0.7):
+            builder.add_arg(v)
+        out.append(builder.build().dgram)
+    return out
+
+def generate(port, rate, duration, sent):
+    """Generator process: send round-robin band packets; report the count sent"""
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    dgrams, n = packets(), 0
+    start = time.perf_counter()
+    end = start + duration
+    while True:
+        now = time.perf_counter()
+        if now >= end:
+            break
+        # Send in bursts of 32 like a sender waking up after a scheduling delay
+        for _ in range(32):
+            sock.sendto(dgrams[n % 4], ("127.0.0.1", port))
+            n += 1
+        if rate:
+            delay = start + n / rate - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+    sent.value = n
+
+class Counter:
+    def __init__(self):
+        self.n = 0
+
+    def numpy_handler(self, address, *args):
+        np.mean([x for x in args if not np.isnan(x)])
+        self.n += 1
+
+    def batch_handler(self, messages):
+        for address, args in messages:
+            finite = [x for x in args if x == x]
+            sum(finite) / len(finite)
+        self.n += len(messages)
+
+def start_pythonosc(server_cls, counter):
+    disp = dispatcher.Dispatcher()
+    for band in BANDS:
+        disp.map(f"/muse/elements/{band}_absolute", counter.numpy_handler)
+    server = server_cls(("127.0.0.1", 0), disp)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server.server_address[1], server.shutdown
+
+def start_batched(counter):
+    ingest = OSCIngest()
+    port = ingest.listen(0, counter.batch_handler, "127.0.0.1")
+    ingest.start()
+    return port, ingest.stop
+
+RECEIVERS = {
+    'threading': lambda c: start_pythonosc(osc_server.ThreadingOSCUDPServer, c),
+    'blocking': lambda c: start_pythonosc(osc_server.BlockingOSCUDPServer, c),
+    'batched': start_batched,
+}
+
+def run(name, rate):
+    counter = Counter()
+    port, stop = RECEIVERS[name](counter)
+    sent = mp.Value('q', 0)
+    generator = mp.Process(target=generate, args=(port, rate, DURATION, sent))
+    start = time.perf_counter()
+    generator.start()
+    generator.join()
+    # Let the receiver finish what is already queued in its socket buffer
+    last = -1
+    while counter.n != last:
+        last = counter.n
+        time.sleep(0.2)
+    elapsed = time.perf_counter() - start - 0.2  # minus the final idle check
+    stop()
+    return sent.value, counter.n, elapsed
+
+def main():
+    names = sys.argv[1:] or list(RECEIVERS)
+    print(f"{'receiver':<10} {'offered/s':>10} {'sent':>8} {'received':>9} {'msgs/s':>9} {'dropped':>8}")
+    for rate in RATES:
+        for name in names:
+            sent, received, elapsed = run(name, rate)
+            dropped = 1 - received / sent if sent else 0
+            offered = f"{rate:,}" if rate else "max"
+            print(f"{name:<10} {offered:>10} {sent:>8} {received:>9} "
+                  f"{received / elapsed:>9,.0f} {dropped:>8.1%}")
+
+if __name__ == "__main__":
+    main()
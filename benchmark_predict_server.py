@@ -0,0 +1,77 @@
+"""
+Benchmark: latency and throughput of eeg_predict_server.py
+- Trains a small stand-in model on random features (models/ is not touched)
+- Starts the prediction server on a free local port
+- Several client threads send windows concurrently over persistent connections
+"""
+
+import os
+import sys
+import time
+import tempfile
+import threading
+import numpy as np
+import joblib
+from sklearn.linear_model import LogisticRegression
+from sklearn.preprocessing import StandardScaler
+
+from eeg_features import FeaturePipeline
+from eeg_predict import EEGPredictor
+from eeg_predict_server import MicroBatcher, PredictionServer, PredictionClient
+
+N_CHANNELS = 14
+N_CLIENTS = 8
+WINDOWS_PER_CLIENT = 500
+
+def make_model(model_dir, name="Benchmark"):
+    pipeline = FeaturePipeline(('stats', 'bands'), N_CHANNELS)
+    rng = np.random.default_rng(0)
+    X = pipeline.transform(rng.normal(size=(500,) + (pipeline.window_size, N_CHANNELS)))
+    y = rng.integers(0, 2, len(X))
+    scaler = StandardScaler().fit(X)
+    model = LogisticRegression(max_iter=1000).fit(scaler.transform(X), y)
+    joblib.dump(model, os.path.join(model_dir, f'eeg_model_{name}.pkl'))
+    joblib.dump(scaler, os.path.join(model_dir, f'eeg_scaler_{name}.pkl'))
+    joblib.dump(pipeline.feature_names, os.path.join(model_dir, f'eeg_features_{name}.pkl'))
+    pipeline.save(os.path.join(model_dir, f'eeg_pipeline_{name}.json'))
+    return name
+
+def client_loop(port, windows, rtts):
+    client = PredictionClient(port=port)
+    for window in windows:
+        start = time.perf_counter()
+        client.predict_proba(window)
+        rtts.append(time.perf_counter() - start)
+    client.close()
+
+def main():
+    n_clients = int(sys.argv[1]) if len(sys.argv) > 1 else N_CLIENTS
+    with tempfile.TemporaryDirectory() as model_dir:
+        predictor = EEGPredictor(make_model(model_dir), model_dir)
+    batcher = MicroBatcher(predictor)
+    server = PredictionServer(("127.0.0.1", 0), batcher)
+    port = server.server_address[1]
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    windows = np.random.default_rng(1).normal(size=(WINDOWS_PER_CLIENT,) + predictor.window_shape)
+    rtts = []
+    threads = [threading.Thread(target=client_loop, args=(port, windows, rtts)) for _ in range(n_clients)]
+    start = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - start
+    server.shutdown()
+
+    stats = batcher.stats()
+    p50, p99 = np.percentile(rtts, [50, 99]) * 1000
+    print(f"Clients:            {n_clients} x {WINDOWS_PER_CLIENT} windows "
+          f"({predictor.window_shape[0]} x {predictor.window_shape[1]}, stats+bands)")
+    print(f"Throughput:         {len(rtts) / elapsed:,.0f} windows/s")
+    print(f"Mean batch size:    {stats['mean_batch_size']}")
+    print(f"Server latency:     p50 {stats['p50_ms']:.3f} ms, p99 {stats['p99_ms']:.3f} ms")
+    print(f"Client round trip:  p50 {p50:.3f} ms, p99 {p99:.3f} ms")
+
+if __name__ == "__main__":
+    main()
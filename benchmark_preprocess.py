@@ -0,0 +1,82 @@
+"""
+Benchmark: per-window loop vs batched feature extraction
+- Writes synthetic .mat recordings shaped like data/EEG Data
+- Runs both extraction paths over them (plus Welch band powers for reference)
+- Checks the resulting CSVs are byte-identical
+"""
+
+import os
+import sys
+import time
+import tempfile
+import numpy as np
+from scipy.io import savemat
+
+import preprocess_data as pp
+
+N_FILES = 4
+N_SAMPLES = 200_000   # samples per recording (~26 min at 128 Hz)
+N_CHANNELS = 25
+
+def write_synthetic_mat(path, n_samples, n_channels, seed):
+    """Write a .mat file with the same 'o' struct layout the loader expects"""
+    rng = np.random.default_rng(seed)
+    eeg = rng.normal(4200, 40, size=(n_samples, n_channels))
+    labels = (np.sin(np.arange(n_samples) / 5000) > 0).astype(np.uint8).reshape(-1, 1)
+    o = {
+        'id': np.array([[seed]]),
+        'tag': 'synthetic',
+        'nS': np.array([[n_samples]]),
+        'marker': labels,
+        'data': eeg,
+    }
+    savemat(path, {'o': o})
+
+def run(extract, files, feature_set=pp.DEFAULT_FEATURE_SET):
+    """Extract features from every file; only extraction time is measured"""
+    all_features, all_labels = [], []
+    elapsed = 0.0
+    for path in files:
+        eeg, labels = pp.read_mat_recording(path)
+        start = time.perf_counter()
+        feats, labs = extract(eeg, labels)
+        elapsed += time.perf_counter() - start
+        all_features.append(feats)
+        all_labels.append(labs)
+    df = pp.features_to_dataframe(np.vstack(all_features), np.concatenate(all_labels),
+                                  feature_set=feature_set)
+    return df, elapsed
+
+def main():
+    n_files = int(sys.argv[1]) if len(sys.argv) > 1 else N_FILES
+    with tempfile.TemporaryDirectory() as tmp:
+        files = []
+        for i in range(n_files):
+            path = os.path.join(tmp, f"eeg_record{i + 1}.mat")
+            write_synthetic_mat(path, N_SAMPLES, N_CHANNELS, seed=i)
+            files.append(path)
+        print(f"Generated {n_files} recordings of {N_SAMPLES} x {N_CHANNELS} samples")
+
+        df_loop, t_loop = run(pp.window_features_loop, files)
+        df_batch, t_batch = run(pp.window_features, files)
+        _, t_bands = run(lambda eeg, labels: pp.window_features(eeg, labels, ('bands',)), files, ('bands',))
+
+        csv_loop = os.path.join(tmp, "loop.csv")
+        csv_batch = os.path.join(tmp, "batch.csv")
+        df_loop.to_csv(csv_loop, index=False)
+        df_batch.to_csv(csv_batch, index=False)
+        with open(csv_loop, 'rb') as a, open(csv_batch, 'rb') as b:
+            identical = a.read() == b.read()
+
+    n_windows = len(df_batch)
+    print(f"\nWindows:           {n_windows}")
+    print(f"Per-window loop:   {t_loop:.2f}s ({n_windows / t_loop:,.0f} windows/s)")
+    print(f"Batched:           {t_batch:.2f}s ({n_windows / t_batch:,.0f} windows/s)")
+    print(f"Speedup:           {t_loop / t_batch:.1f}x")
+    print(f"Band powers:       {t_bands:.2f}s ({n_windows / t_bands:,.0f} windows/s)")
+    print(f"CSV bit-identical: {'✓' if identical else '✗'}")
+    if not identical:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
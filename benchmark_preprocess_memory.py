@@ -0,0 +1,62 @@
+"""
+Benchmark: peak memory of in-memory vs streaming preprocessing
+- Writes growing sets of synthetic .mat recordings
+- In-memory: load_all_mat_files + df.to_csv (all windows held at once)
+- Streaming: process_all_mat_files into the binary feature store
+Peak is measured with tracemalloc, which also tracks NumPy buffers.
+"""
+
+import os
+import sys
+import tempfile
+import tracemalloc
+
+import preprocess_data as pp
+from benchmark_preprocess import write_synthetic_mat
+
+N_SAMPLES = 100_000
+N_CHANNELS = 14
+FILE_COUNTS = [4, 16, 32]
+
+def peak_mb(func):
+    tracemalloc.start()
+    func()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return peak / 1e6
+
+def main():
+    counts = [int(n) for n in sys.argv[1:]] or FILE_COUNTS
+    raw_mb = N_SAMPLES * N_CHANNELS * 8 / 1e6
+    print(f"Recording size: {N_SAMPLES} x {N_CHANNELS} float64 ({raw_mb:.1f} MB raw)\n")
+    print(f"{'Files':>6} {'In-memory peak':>16} {'Streaming peak':>16}")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        folder = os.path.join(tmp, "EEG Data")
+        os.makedirs(folder)
+        written = 0
+        for n_files in counts:
+            while written < n_files:
+                write_synthetic_mat(os.path.join(folder, f"eeg_record{written + 1}.mat"),
+                                    N_SAMPLES, N_CHANNELS, seed=written)
+                written += 1
+
+            csv_path = os.path.join(tmp, "features.csv")
+            store_path = os.path.join(tmp, "features_store")
+            devnull = open(os.devnull, 'w')
+            stdout, sys.stdout = sys.stdout, devnull
+            try:
+                in_memory = peak_mb(lambda: pp.load_all_mat_files(folder).to_csv(csv_path, index=False))
+
+                def streaming():
+                    with pp.LazyStoreWriter(store_path) as writer:
+                        pp.process_all_mat_files(folder, writer)
+                streamed = peak_mb(streaming)
+            finally:
+                sys.stdout = stdout
+                devnull.close()
+
+            print(f"{n_files:>6} {in_memory:>13.1f} MB {streamed:>13.1f} MB")
+
+if __name__ == "__main__":
+    main()
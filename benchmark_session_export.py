@@ -0,0 +1,100 @@
+"""
+Benchmark: session export, per-row openpyxl vs session_export.py
+- Records synthetic attention samples with SessionRecorder (like the Tk reader)
+- legacy:  list of dicts -> openpyxl Workbook, ws.append per row
+           (the previous save_session_data; timed from the dicts in memory)
+- xlsx-*:  session_export per xlsx engine (xlsxwriter constant_memory when
+           installed, openpyxl write-only)
+- csv, parquet (parquet needs pyarrow or fastparquet; skipped otherwise)
+Usage: python benchmark_session_export.py [rows ...] [--legacy-max ROWS]
+"""
+
+import os
+import time
+import argparse
+import tempfile
+from datetime import datetime
+import numpy as np
+from openpyxl import Workbook
+from openpyxl.styles import Font, PatternFill, Alignment
+
+import session_export
+from session_recorder import SessionRecorder, read_recording
+
+SIZES = [10_000, 100_000, 1_000_000]
+COLUMNS = [('timestamp', 'f8'), ('attention', 'f4'), ('alpha', 'f4'), ('beta', 'f4')]
+HEADERS = ["Timestamp", "Attention", "Alpha", "Beta"]
+
+def record(path, n):
+    rng = np.random.default_rng(0)
+    values = rng.uniform(0.2, 2.0, size=(n, 3))
+    start = time.time()
+    with SessionRecorder(path, COLUMNS) as recorder:
+        for i in range(n):
+            recorder.append(start + i / 256, values[i, 0] / 2, values[i, 1], values[i, 2])
+
+def legacy_export(log_data, path):
+    """The previous save_session_data: full openpyxl object model, one append per row"""
+    wb = Workbook()
+    ws = wb.active
+    ws.title = "EEG Data"
+    ws.append(HEADERS)
+    for cell in ws[1]:
+        cell.fill = PatternFill(start_color="4472C4", end_color="4472C4", fill_type="solid")
+        cell.font = Font(bold=True, color="FFFFFF")
+        cell.alignment = Alignment(horizontal="center")
+    for entry in log_data:
+        ws.append([entry["timestamp"], entry["attention"], entry["alpha"], entry["beta"]])
+    wb.save(path)
+
+def as_dicts(columns):
+    return [{"timestamp": datetime.fromtimestamp(t).isoformat(), "attention": float(a),
+             "alpha": float(al), "beta": float(b)}
+            for t, a, al, b in zip(columns['timestamp'], columns['attention'],
+                                   columns['alpha'], columns['beta'])]
+
+def timed(func, *args, **kwargs):
+    start = time.perf_counter()
+    func(*args, **kwargs)
+    return time.perf_counter() - start
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("rows", type=int, nargs="*", default=SIZES)
+    parser.add_argument("--legacy-max", type=int, default=max(SIZES),
+                        help="skip the legacy writer above this many rows (it holds every cell in RAM)")
+    args = parser.parse_args()
+
+    engines = [e for e in session_export.XLSX_ENGINES
+               if e != 'xlsxwriter' or session_export.xlsxwriter is not None]
+    print(f"{'rows':>9} {'method':<13} {'seconds':>8} {'rows/s':>10} {'MB':>7}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for n in args.rows:
+            recording = os.path.join(tmp, f"rec_{n}")
+            record(recording, n)
+            columns = read_recording(recording)
+            runs = []
+            if n <= args.legacy_max:
+                log_data = as_dicts(columns)
+                runs.append(('legacy', 'xlsx', lambda path: legacy_export(log_data, path)))
+            for engine in engines:
+                runs.append((f'xlsx-{engine}', 'xlsx', lambda path, engine=engine: session_export.export_recording(
+                    recording, path, 'xlsx', headers=HEADERS, engine=engine)))
+            for fmt in session_export.FORMATS[1:]:
+                runs.append((fmt, fmt, lambda path, fmt=fmt: session_export.export_recording(
+                    recording, path, fmt, headers=HEADERS)))
+            for name, ext, export in runs:
+                path = os.path.join(tmp, f"out_{n}_{name}.{ext}")
+                try:
+                    seconds = timed(export, path)
+                except ImportError as e:
+                    print(f"{n:>9} {name:<13} skipped ({e.__class__.__name__}: no parquet engine)")
+                    continue
+                size = os.path.getsize(path) / 1e6
+                print(f"{n:>9} {name:<13} {seconds:>8.2f} {n / seconds:>10,.0f} {size:>7.1f}")
+                os.remove(path)
+            if n <= args.legacy_max:
+                del log_data
+
+if __name__ == "__main__":
+    main()
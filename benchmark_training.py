@@ -0,0 +1,94 @@
+"""
+Benchmark: model fit time, peak memory and accuracy vs dataset size
+- Synthetic EEG-like feature windows (N_FEATURES columns, nonlinear labels)
+  generated straight into float64 or float32 arrays, 1M rows at a time
+- Every (model, dtype, size) runs in a fresh process so its peak RSS is its
+  own; the data itself accounts for rows x features x itemsize of it
+- Models are the train_ml_model.py candidates (make_model); slow ones are
+  skipped above their row limit in MAX_ROWS (exact GradientBoosting is
+  single-threaded and grows ~linearly with rows x features x trees)
+Usage: python benchmark_training.py [rows ...] [--models ...] [--dtypes float64 float32]
+"""
+
+import sys
+import json
+import time
+import argparse
+import subprocess
+import numpy as np
+
+SIZES = [10_000, 100_000, 1_000_000, 10_000_000]
+N_FEATURES = 20
+TEST_ROWS = 100_000  # held out for accuracy (fewer for small sizes)
+GEN_CHUNK = 1_000_000
+MODELS = ['Logistic Regression', 'Random Forest', 'Gradient Boosting', 'Hist Gradient Boosting']
+MAX_ROWS = {'Gradient Boosting': 1_000_000, 'Random Forest': 1_000_000}
+
+def make_data(n, dtype, seed=0):
+    """Rows of features and labels, generated chunk by chunk into the final arrays"""
+    rng = np.random.default_rng(seed)
+    X = np.empty((n, N_FEATURES), dtype=dtype)
+    y = np.empty(n, dtype=np.int8)
+    for start in range(0, n, GEN_CHUNK):
+        stop = min(start + GEN_CHUNK, n)
+        block = rng.standard_normal((stop - start, N_FEATURES))
+        score = block[:, 0] * block[:, 1] + np.sin(2 * block[:, 2]) + 0.5 * block[:, 3] - 0.3 * block[:, 4] ** 2
+        y[start:stop] = score + 0.5 * rng.standard_normal(stop - start) > 0
+        X[start:stop] = block
+    return X, y
+
+def run_one(name, n, dtype):
+    """Child process: generate, scale, fit, score; prints one JSON result"""
+    from sklearn.preprocessing import StandardScaler
+    from train_ml_model import make_model, peak_rss_mb
+
+    n_test = min(TEST_ROWS, n // 5)
+    X, y = make_data(n + n_test, dtype)
+    X_train, y_train, X_test, y_test = X[:n], y[:n], X[n:], y[n:]
+    start = time.perf_counter()
+    scaler = StandardScaler(copy=False).fit(X_train)
+    X_train, X_test = scaler.transform(X_train), scaler.transform(X_test)
+    model = make_model(name)
+    cpu = time.process_time()
+    fit_start = time.perf_counter()
+    model.fit(X_train, y_train)
+    fit_sec = time.perf_counter() - fit_start
+    cpu_sec = time.process_time() - cpu
+    accuracy = float((model.predict(X_test) == y_test).mean())
+    print(json.dumps({'fit_sec': fit_sec, 'total_sec': time.perf_counter() - start, 'cpu_sec': cpu_sec,
+                      'peak_mb': peak_rss_mb(), 'data_mb': X.nbytes / 1e6, 'accuracy': accuracy,
+                      'dtype_in_model': str(X_train.dtype)}))
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("rows", type=int, nargs="*", default=SIZES)
+    parser.add_argument("--models", nargs="+", default=MODELS, choices=MODELS)
+    parser.add_argument("--dtypes", nargs="+", default=['float64', 'float32'], choices=['float64', 'float32'])
+    parser.add_argument("--no-limits", action="store_true", help="ignore MAX_ROWS")
+    parser.add_argument("--worker", nargs=3, metavar=("MODEL", "ROWS", "DTYPE"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.worker:
+        name, n, dtype = args.worker
+        run_one(name, int(n), dtype)
+        return
+
+    print(f"{'rows':>10} {'model':<23} {'dtype':<8} {'fit s':>8} {'cores':>6} {'peak MB':>8} "
+          f"{'data MB':>8} {'accuracy':>9}")
+    for n in args.rows:
+        for name in args.models:
+            for dtype in args.dtypes:
+                if not args.no_limits and n > MAX_ROWS.get(name, n):
+                    print(f"{n:>10,} {name:<23} {dtype:<8} skipped (> {MAX_ROWS[name]:,} rows; --no-limits)")
+                    continue
+                out = subprocess.run([sys.executable, __file__, "--worker", name, str(n), dtype],
+                                     capture_output=True, text=True)
+                if out.returncode != 0:
+                    print(f"{n:>10,} {name:<23} {dtype:<8} failed: {out.stderr.strip().splitlines()[-1:]}")
+                    continue
+                r = json.loads(out.stdout.strip().splitlines()[-1])
+                peak = 'n/a' if r['peak_mb'] is None else f"{r['peak_mb']:.0f}"
+                print(f"{n:>10,} {name:<23} {dtype:<8} {r['fit_sec']:>8.2f} {r['cpu_sec'] / r['fit_sec']:>6.1f} "
+                      f"{peak:>8} {r['data_mb']:>8.0f} {r['accuracy']:>9.3f}")
+
+if __name__ == "__main__":
+    main()
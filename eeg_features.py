@@ -0,0 +1,243 @@
+"""
+EEG Feature Registry
+- Named, vectorized feature extractors declared once with @register_feature
+- Shared by preprocessing (training data) and live prediction
+- FeaturePipeline records the feature set, its version and the windowing
+  parameters; it is saved next to each model so inference rebuilds exactly
+  the features the model was trained on
+"""
+
+import json
+from collections import namedtuple
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+# Windowing
+WINDOW_SIZE = 128  # samples per window
+STEP_SIZE = 64     # overlap
+SAMPLING_RATE = 128  # Hz of the recordings in data/EEG Data
+BATCH_WINDOWS = 1024  # windows reduced per NumPy call (bounds the temporary copy)
+
+FEATURE_SET_VERSION = 1  # bump whenever any extractor's output changes
+DEFAULT_FEATURE_SET = ('stats',)
+
+STATS = ('mean', 'std', 'min', 'max')
+WELCH_NPERSEG = WINDOW_SIZE  # Welch segment length (== window: one Hann segment, 1 Hz bins)
+BANDS = {
+    'delta': (1, 4),
+    'theta': (4, 8),
+    'alpha': (8, 13),
+    'beta': (13, 30),
+    'gamma': (30, 45),
+}
+
+# name -> Feature; extractors map (n_windows, window_size, n_channels) windows
+# to (n_windows, len(columns) * n_channels) features, grouped per channel
+Feature = namedtuple('Feature', ['name', 'extract', 'columns'])
+FEATURES = {}
+
+def register_feature(name, columns):
+    """Decorator registering a batched extractor f(windows, fs) under name"""
+    def decorator(func):
+        if name in FEATURES:
+            raise ValueError(f"Feature '{name}' is already registered")
+        FEATURES[name] = Feature(name, func, tuple(columns))
+        return func
+    return decorator
+
+def sliding_windows(data, window_size=WINDOW_SIZE, step_size=STEP_SIZE):
+    """
+    Zero-copy strided view of every window along the first axis:
+    (n_samples, ...) -> (n_windows, window_size, ...)
+    """
+    if len(data) < window_size:
+        return np.empty((0, window_size) + data.shape[1:], dtype=data.dtype)
+    view = sliding_window_view(data, window_size, axis=0)[::step_size]
+    return np.moveaxis(view, -1, 1)
+
+@register_feature('stats', STATS)
+def extract_features_batch(windows, fs=SAMPLING_RATE):
+    """
+    Mean, Std, Min, Max per channel for a batch of windows
+    (fs is unused; all extractors share one signature).
+    Columns keep the per-channel [mean, std, min, max] order.
+    """
+    n_windows, _, n_channels = windows.shape
+    means, stds, mins, maxs = [], [], [], []
+    for start in range(0, n_windows, BATCH_WINDOWS):
+        # Reductions run over a contiguous copy of each block so NumPy uses
+        # the same pairwise summation as the per-window path (bit-identical)
+        block = np.ascontiguousarray(windows[start:start + BATCH_WINDOWS].transpose(0, 2, 1))
+        means.append(block.mean(axis=-1))
+        stds.append(block.std(axis=-1))
+        mins.append(block.min(axis=-1))
+        maxs.append(block.max(axis=-1))
+
+    if not means:
+        return np.empty((0, 4 * n_channels))
+
+    stats = [np.concatenate(s) for s in (means, stds, mins, maxs)]
+    features = np.empty((n_windows, 4 * n_channels), dtype=np.result_type(*stats))
+    for i, stat in enumerate(stats):
+        features[:, i::4] = stat
+    return features
+
+def welch_psd(windows, fs=SAMPLING_RATE, nperseg=WELCH_NPERSEG):
+    """
+    Welch PSD along axis 1 of (n_windows, window_size, n_channels) windows:
+    Hann segments with 50% overlap, mean-detrended, one-sided density.
+    Same result as scipy.signal.welch(windows, fs, nperseg=nperseg, axis=1),
+    without its per-call overhead (matters for single live windows).
+    Returns (freqs, psd) with psd shaped (n_windows, n_freqs, n_channels).
+    """
+    window_size = windows.shape[1]
+    nperseg = min(nperseg, window_size)
+    taper = 0.5 - 0.5 * np.cos(2 * np.pi * np.arange(nperseg) / nperseg)  # periodic Hann
+    # (n_windows, n_segments, nperseg, n_channels)
+    segments = sliding_window_view(windows, nperseg, axis=1)[:, ::nperseg - nperseg // 2]
+    segments = np.moveaxis(segments, -1, 2)
+    segments = segments - segments.mean(axis=2, keepdims=True)
+    spectrum = np.fft.rfft(segments * taper[:, None], axis=2)
+    psd = (spectrum.real ** 2 + spectrum.imag ** 2).mean(axis=1) / (fs * (taper ** 2).sum())
+    # One-sided: double everything except DC (and Nyquist for even lengths)
+    psd[:, 1:(None if nperseg % 2 else -1)] *= 2
+    return np.fft.rfftfreq(nperseg, 1 / fs), psd
+
+@register_feature('bands', BANDS)
+def extract_band_powers_batch(windows, fs=SAMPLING_RATE, nperseg=WELCH_NPERSEG):
+    """
+    Band power per channel for a batch of windows via Welch's method.
+    Columns are per channel in BANDS order (delta, theta, alpha, beta, gamma).
+    """
+    n_windows, _, n_channels = windows.shape
+    out_dtype = np.float32 if windows.dtype == np.float32 else np.float64
+    features = np.empty((n_windows, len(BANDS) * n_channels), dtype=out_dtype)
+    for start in range(0, n_windows, BATCH_WINDOWS):
+        block = windows[start:start + BATCH_WINDOWS]
+        # One FFT call over every window/segment/channel in the block
+        freqs, psd = welch_psd(block, fs, nperseg)
+        df = freqs[1] - freqs[0]
+        for i, (lo, hi) in enumerate(BANDS.values()):
+            bins = (freqs >= lo) & (freqs < hi)
+            features[start:start + len(block), i::len(BANDS)] = psd[:, bins, :].sum(axis=1) * df
+    return features
+
+def check_feature_set(feature_set):
+    unknown = [name for name in feature_set if name not in FEATURES]
+    if unknown or not feature_set:
+        raise ValueError(f"Unknown feature(s): {', '.join(unknown) or '(none given)'} "
+                         f"(available: {', '.join(FEATURES)})")
+    return tuple(feature_set)
+
+def extract_feature_set(windows, feature_set=DEFAULT_FEATURE_SET, fs=SAMPLING_RATE):
+    """Concatenate the columns of every extractor in feature_set"""
+    if len(feature_set) == 1:
+        return FEATURES[feature_set[0]].extract(windows, fs)
+    return np.hstack([FEATURES[name].extract(windows, fs) for name in feature_set])
+
+def features_per_channel(feature_set=DEFAULT_FEATURE_SET):
+    return sum(len(FEATURES[name].columns) for name in feature_set)
+
+def feature_names(n_channels, feature_set=DEFAULT_FEATURE_SET):
+    """Column names matching extract_feature_set output, e.g. ch0_mean, ch0_alpha"""
+    return [f"ch{ch}_{suffix}"
+            for name in feature_set
+            for ch in range(n_channels)
+            for suffix in FEATURES[name].columns]
+
+def infer_feature_set(names):
+    """
+    (feature_set, n_channels) that produced the given column names, or None.
+    Models trained before named columns (columns '0'..'N') are stats features.
+    """
+    names = [str(n) for n in names]
+    if names and all(n.isdigit() for n in names) and len(names) % len(STATS) == 0:
+        return ('stats',), len(names) // len(STATS)
+
+    feature_set, i = [], 0
+    while i < len(names):
+        suffix = names[i].split('_', 1)[-1]
+        match = next((f for f in FEATURES.values() if suffix in f.columns), None)
+        if match is None or match.name in feature_set:
+            return None
+        feature_set.append(match.name)
+        while i < len(names) and names[i].split('_', 1)[-1] in match.columns:
+            i += 1
+    if not feature_set:
+        return None
+    n_channels = len(names) // features_per_channel(feature_set)
+    if feature_names(n_channels, feature_set) != names:
+        return None
+    return tuple(feature_set), n_channels
+
+class FeaturePipeline:
+    """Window -> feature transform, serializable next to a trained model"""
+
+    def __init__(self, feature_set=DEFAULT_FEATURE_SET, n_channels=None, window_size=WINDOW_SIZE,
+                 step_size=STEP_SIZE, sampling_rate=SAMPLING_RATE, version=FEATURE_SET_VERSION):
+        self.feature_set = check_feature_set(feature_set)
+        self.n_channels = n_channels
+        self.window_size = window_size
+        self.step_size = step_size
+        self.sampling_rate = sampling_rate
+        self.version = version
+
+    @property
+    def feature_names(self):
+        return feature_names(self.n_channels, self.feature_set)
+
+    @property
+    def n_features(self):
+        return features_per_channel(self.feature_set) * self.n_channels
+
+    def transform(self, windows):
+        """(n_windows, window_size, n_channels) -> (n_windows, n_features)"""
+        windows = np.asarray(windows)
+        expected = (self.window_size, self.n_channels)
+        if windows.ndim != 3 or windows.shape[1:] != expected:
+            raise ValueError(f"Expected windows of shape (n, {expected[0]}, {expected[1]}), "
+                             f"got {windows.shape}")
+        return extract_feature_set(windows, self.feature_set, self.sampling_rate)
+
+    def transform_window(self, window):
+        """One (window_size, n_channels) window -> (1, n_features)"""
+        return self.transform(np.asarray(window)[None])
+
+    def to_dict(self):
+        return {
+            'feature_set': list(self.feature_set),
+            'feature_set_version': self.version,
+            'n_channels': self.n_channels,
+            'window_size': self.window_size,
+            'step_size': self.step_size,
+            'sampling_rate': self.sampling_rate,
+            'feature_names': self.feature_names,
+        }
+
+    @classmethod
+    def from_dict(cls, d):
+        return cls(d['feature_set'], d['n_channels'], d['window_size'], d['step_size'],
+                   d['sampling_rate'], d['feature_set_version'])
+
+    @classmethod
+    def from_feature_names(cls, names, **params):
+        """Rebuild the pipeline from column names (CSV data or legacy models)"""
+        inferred = infer_feature_set(names)
+        if inferred is None:
+            raise ValueError("Feature names do not match any registered feature set")
+        feature_set, n_channels = inferred
+        return cls(feature_set, n_channels, **params)
+
+    def save(self, path):
+        with open(path, 'w') as f:
+            json.dump(self.to_dict(), f, indent=2)
+
+    @classmethod
+    def load(cls, path):
+        """Load a saved pipeline, refusing ones built by a different feature version"""
+        with open(path) as f:
+            pipeline = cls.from_dict(json.load(f))
+        if pipeline.version != FEATURE_SET_VERSION:
+            raise ValueError(f"{path} was built with feature set version {pipeline.version}, "
+                             f"current code is version {FEATURE_SET_VERSION}; retrain the model")
+        return pipeline
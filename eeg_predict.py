@@ -1,30 +1,98 @@
+"""
+Live EEG prediction with a model saved by train_ml_model.py
+- Loads the model, scaler and feature pipeline once
+- Rebuilds exactly the features the model was trained on (see eeg_features.py)
+- Predicts concentration for raw (window_size, n_channels) EEG windows
+"""
+
+import os
+import glob
 import numpy as np
 import joblib
+from sklearn import config_context
+from sklearn.preprocessing import StandardScaler
+
+from eeg_features import FeaturePipeline
+
+MODEL_DIR = 'models'
+
+def latest_model_name(model_dir=MODEL_DIR):
+    """Name of the most recently saved model in model_dir"""
+    paths = glob.glob(os.path.join(model_dir, 'eeg_model_*.pkl'))
+    if not paths:
+        raise FileNotFoundError(f"No saved models in {model_dir}/ - run train_ml_model.py first")
+    latest = max(paths, key=os.path.getmtime)
+    return os.path.basename(latest)[len('eeg_model_'):-len('.pkl')]
+
+class EEGPredictor:
+    """Model + scaler + feature pipeline for one saved model (default: the latest)"""
+
+    def __init__(self, model_name=None, model_dir=MODEL_DIR):
+        if model_name is None:
+            model_name = latest_model_name(model_dir)
+        self.model_name = model_name
+        self.model = joblib.load(os.path.join(model_dir, f'eeg_model_{model_name}.pkl'))
+        self.scaler = joblib.load(os.path.join(model_dir, f'eeg_scaler_{model_name}.pkl'))
+        self.feature_names = list(joblib.load(os.path.join(model_dir, f'eeg_features_{model_name}.pkl')))
+
+        pipeline_path = os.path.join(model_dir, f'eeg_pipeline_{model_name}.json')
+        if os.path.exists(pipeline_path):
+            self.pipeline = FeaturePipeline.load(pipeline_path)
+        else:  # models saved before pipelines were recorded
+            self.pipeline = FeaturePipeline.from_feature_names(self.feature_names)
+
+        if self.pipeline.n_features != len(self.feature_names):
+            raise ValueError(f"Pipeline produces {self.pipeline.n_features} features but "
+                             f"{model_name} was trained on {len(self.feature_names)}")
+
+        # StandardScaler.transform is just (x - mean) / scale; doing it directly
+        # skips sklearn's input validation, which dominates for single windows
+        self._offset = self._scale = None
+        if type(self.scaler) is StandardScaler:
+            self._offset = self.scaler.mean_ if self.scaler.with_mean else 0.0
+            self._scale = self.scaler.scale_ if self.scaler.with_std else 1.0
+
+    def scale(self, features):
+        if self._offset is None:
+            return self.scaler.transform(features)
+        return (features - self._offset) / self._scale
+
+    @property
+    def window_shape(self):
+        return (self.pipeline.window_size, self.pipeline.n_channels)
+
+    def predict_proba(self, windows):
+        """(n_windows, window_size, n_channels) raw EEG -> (n_windows, n_classes)"""
+        features = self.scale(self.pipeline.transform(windows))
+        with config_context(assume_finite=True):
+            return self.model.predict_proba(features)
+
+    def predict(self, windows):
+        features = self.scale(self.pipeline.transform(windows))
+        with config_context(assume_finite=True):
+            return self.model.predict(features)
 
-# 1️⃣ Load your trained model and scaler
-model = joblib.load('models/eeg_model_Logistic Regression.pkl')
-scaler = joblib.load('models/eeg_scaler_Logistic Regression.pkl')
-feature_names = joblib.load('models/eeg_features_Logistic Regression.pkl')
+    def focus_probability(self, windows):
+        """P(concentrated) for each window"""
+        positive = list(self.model.classes_).index(1)
+        return self.predict_proba(windows)[:, positive]
 
-# 2️⃣ Collect or simulate a window of EEG data (alpha + beta)
-# Example: shape must match the features used in training
-alpha_beta_window = np.array([...])  # your 128-sample EEG window
+    def predict_window(self, window):
+        """One (window_size, n_channels) raw EEG window -> 0/1 concentration"""
+        return int(self.predict(np.asarray(window)[None])[0])
 
-# 3️⃣ Extract features (mean, std, min, max)
-mean = np.mean(alpha_beta_window)
-std = np.std(alpha_beta_window)
-min_val = np.min(alpha_beta_window)
-max_val = np.max(alpha_beta_window)
+def main():
+    predictor = EEGPredictor()
 
-features = np.array([[mean, std, min_val, max_val]])
+    # Collect or simulate a window of raw EEG (window_size samples x n_channels)
+    window = np.random.default_rng(0).normal(size=predictor.window_shape)
 
-# 4️⃣ Scale features
-features_scaled = scaler.transform(features)
+    prediction = predictor.predict_window(window)
 
-# 5️⃣ Predict concentration
-prediction = model.predict(features_scaled)
+    if prediction == 1:
+        print("Concentrated")
+    else:
+        print("Not Concentrated")
 
-if prediction[0] == 1:
-    print("Concentrated")
-else:
-    print("Not Concentrated")
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,223 @@
+"""
+Long-running EEG prediction service
+- Loads a saved model, scaler and feature pipeline once (see eeg_predict.py)
+- Accepts raw EEG windows over a local TCP socket
+- Micro-batches concurrent requests into one transform + predict_proba call
+- Reports p50/p99 latency (queue -> result) for recent requests
+
+Wire protocol (little-endian), one connection can send many frames:
+  request:  uint32 n_samples, uint32 n_channels, float32[n_samples * n_channels]
+  response: uint32 n_classes, float32[n_classes]
+  stats:    send n_samples = n_channels = 0; reply is uint32 length + JSON
+A header whose shape isn't the model's window shape closes the connection
+(its payload is never read).
+"""
+
+import json
+import time
+import queue
+import socket
+import struct
+import argparse
+import threading
+import socketserver
+from concurrent.futures import Future
+import numpy as np
+
+from eeg_predict import EEGPredictor, MODEL_DIR
+
+HOST, PORT = "127.0.0.1", 5005
+MAX_BATCH = 256        # windows per predict_proba call
+MAX_WAIT_SEC = 0.0  # extra wait for more requests once one arrives (0: take what is queued)
+LATENCY_WINDOW = 10000  # latencies kept for percentiles
+
+HEADER = struct.Struct('<II')
+COUNT = struct.Struct('<I')
+
+class MicroBatcher:
+    """
+    Collects windows from many threads and classifies them in batches on one
+    worker thread, so concurrent requests share a single scaler.transform +
+    model.predict_proba call.
+    """
+
+    def __init__(self, predictor, max_batch=MAX_BATCH, max_wait=MAX_WAIT_SEC):
+        self.predictor = predictor
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        self.requests = queue.SimpleQueue()
+        self.latencies = np.zeros(LATENCY_WINDOW)
+        self.n_requests = 0
+        self.n_batches = 0
+        self._lock = threading.Lock()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def submit(self, window):
+        """Queue one (window_size, n_channels) window; returns a Future of its probabilities"""
+        future = Future()
+        self.requests.put((np.asarray(window, dtype=np.float64), future, time.perf_counter()))
+        return future
+
+    def predict_proba(self, window, timeout=None):
+        return self.submit(window).result(timeout)
+
+    def _collect(self):
+        batch = [self.requests.get()]
+        deadline = time.perf_counter() + self.max_wait
+        while len(batch) < self.max_batch:
+            try:
+                batch.append(self.requests.get_nowait())
+            except queue.Empty:
+                remaining = deadline - time.perf_counter()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self.requests.get(timeout=remaining))
+                except queue.Empty:
+                    break
+        return batch
+
+    def _run(self):
+        expected = self.predictor.window_shape
+        while True:
+            batch = self._collect()
+            valid = []
+            for window, future, submitted in batch:
+                if window.shape != expected:
+                    future.set_exception(ValueError(f"Expected window of shape {expected}, got {window.shape}"))
+                else:
+                    valid.append((window, future, submitted))
+            if not valid:
+                continue
+
+            try:
+                probas = self.predictor.predict_proba(np.stack([w for w, _, _ in valid]))
+            except Exception as e:
+                for _, future, _ in valid:
+                    future.set_exception(e)
+                continue
+
+            done = time.perf_counter()
+            with self._lock:
+                for _, _, submitted in valid:
+                    self.latencies[self.n_requests % LATENCY_WINDOW] = done - submitted
+                    self.n_requests += 1
+                self.n_batches += 1
+            for (_, future, _), proba in zip(valid, probas):
+                future.set_result(proba)
+
+    def stats(self):
+        with self._lock:
+            n = min(self.n_requests, LATENCY_WINDOW)
+            recent = self.latencies[:n].copy()
+            n_requests, n_batches = self.n_requests, self.n_batches
+        stats = {'model': self.predictor.model_name, 'requests': n_requests, 'batches': n_batches,
+                 'mean_batch_size': round(n_requests / n_batches, 2) if n_batches else 0}
+        if n:
+            p50, p99 = np.percentile(recent, [50, 99]) * 1000
+            stats.update({'p50_ms': round(p50, 3), 'p99_ms': round(p99, 3)})
+        return stats
+
+def _recv_exact(sock, n):
+    buf = bytearray(n)
+    view = memoryview(buf)
+    while n:
+        read = sock.recv_into(view, n)
+        if not read:
+            raise ConnectionError("connection closed")
+        view = view[read:]
+        n -= read
+    return buf
+
+class PredictionHandler(socketserver.BaseRequestHandler):
+    """Serves frames on one connection until the client disconnects"""
+
+    def handle(self):
+        sock = self.request
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        batcher = self.server.batcher
+        try:
+            while True:
+                n_samples, n_channels = HEADER.unpack(_recv_exact(sock, HEADER.size))
+                if n_samples == 0:
+                    payload = json.dumps(batcher.stats()).encode()
+                    sock.sendall(COUNT.pack(len(payload)) + payload)
+                    continue
+                if (n_samples, n_channels) != tuple(batcher.predictor.window_shape):
+                    # Checked before reading: a bad header could ask for gigabytes
+                    print(f"⚠ Closing connection: window shape ({n_samples}, {n_channels}), "
+                          f"expected {tuple(batcher.predictor.window_shape)}")
+                    return
+                data = _recv_exact(sock, 4 * n_samples * n_channels)
+                window = np.frombuffer(data, dtype='<f4').reshape(n_samples, n_channels)
+                try:
+                    proba = batcher.predict_proba(window)
+                except ValueError as e:
+                    print(f"⚠ Rejected request: {e}")
+                    proba = np.empty(0)
+                sock.sendall(COUNT.pack(len(proba)) + np.asarray(proba, dtype='<f4').tobytes())
+        except ConnectionError:
+            pass
+
+class PredictionServer(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, address, batcher):
+        self.batcher = batcher
+        super().__init__(address, PredictionHandler)
+
+class PredictionClient:
+    """Blocking client for PredictionServer; keeps one connection open"""
+
+    def __init__(self, host=HOST, port=PORT):
+        self.sock = socket.create_connection((host, port))
+        self.sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+    def predict_proba(self, window):
+        """Class probabilities for one (n_samples, n_channels) window (empty if rejected;
+        a window of the wrong shape closes the connection)"""
+        window = np.ascontiguousarray(window, dtype='<f4')
+        self.sock.sendall(HEADER.pack(*window.shape) + window.tobytes())
+        (n_classes,) = COUNT.unpack(_recv_exact(self.sock, COUNT.size))
+        return np.frombuffer(_recv_exact(self.sock, 4 * n_classes), dtype='<f4')
+
+    def stats(self):
+        self.sock.sendall(HEADER.pack(0, 0))
+        (length,) = COUNT.unpack(_recv_exact(self.sock, COUNT.size))
+        return json.loads(bytes(_recv_exact(self.sock, length)))
+
+    def close(self):
+        self.sock.close()
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve a trained EEG model over a local socket")
+    parser.add_argument("--model", default=None, help="model name (default: latest in models/)")
+    parser.add_argument("--model-dir", default=MODEL_DIR)
+    parser.add_argument("--host", default=HOST)
+    parser.add_argument("--port", type=int, default=PORT)
+    parser.add_argument("--stats-every", type=float, default=10.0, help="seconds between latency reports")
+    args = parser.parse_args()
+
+    predictor = EEGPredictor(args.model, args.model_dir)
+    batcher = MicroBatcher(predictor)
+    server = PredictionServer((args.host, args.port), batcher)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    print(f"✓ Serving '{predictor.model_name}' on {args.host}:{args.port} "
+          f"(windows of {predictor.window_shape[0]} x {predictor.window_shape[1]})")
+
+    try:
+        while True:
+            time.sleep(args.stats_every)
+            stats = batcher.stats()
+            if stats['requests']:
+                print(f"requests={stats['requests']} batch={stats['mean_batch_size']} "
+                      f"p50={stats['p50_ms']}ms p99={stats['p99_ms']}ms")
+    except KeyboardInterrupt:
+        print("Exiting")
+        server.shutdown()
+        server.server_close()
+
+if __name__ == "__main__":
+    main()
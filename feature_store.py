@@ -0,0 +1,174 @@
+"""
+Binary feature store for processed EEG windows
+- One directory per dataset (default: data/processed_features/)
+- features.npy  float32 (n_rows, n_features), memory-mappable
+- labels.npy    int8    (n_rows,)
+- recording.npy int32   (n_rows,) index into meta['recordings']
+- subject.npy   int32   (n_rows,) index into meta['subjects']
+- meta.json     feature names, recording/subject tables, extraction parameters
+meta.json is written last, so a store without it is incomplete and is rejected.
+"""
+
+import os
+import json
+import struct
+import numpy as np
+
+STORE_VERSION = 1
+META_FILE = "meta.json"
+HEADER_LEN = 128  # fixed .npy header size so the row count can be patched in place
+
+COLUMNS = {
+    'features': np.float32,
+    'labels': np.int8,
+    'recording': np.int32,
+    'subject': np.int32,
+}
+
+def _npy_header(dtype, shape):
+    """Version 1.0 .npy header padded to exactly HEADER_LEN bytes"""
+    header = repr({
+        'descr': np.lib.format.dtype_to_descr(np.dtype(dtype)),
+        'fortran_order': False,
+        'shape': tuple(shape),
+    })
+    magic = np.lib.format.magic(1, 0)
+    pad = HEADER_LEN - len(magic) - 2 - len(header) - 1
+    if pad < 0:
+        raise ValueError(f"Shape {shape} does not fit in a {HEADER_LEN}-byte header")
+    text = header + ' ' * pad + '\n'
+    return magic + struct.pack('<H', len(text)) + text.encode('latin1')
+
+class FeatureStoreWriter:
+    """
+    Appends windows to a feature store without holding them in memory.
+    Rows are written straight to the .npy files; the headers are patched with
+    the final row count on close().
+    """
+
+    def __init__(self, path, feature_names, metadata=None):
+        self.path = path
+        self.feature_names = list(feature_names)
+        self.metadata = dict(metadata or {})
+        self.recordings = []
+        self.subjects = []
+        self.n_rows = 0
+        os.makedirs(path, exist_ok=True)
+        meta_path = os.path.join(path, META_FILE)
+        if os.path.exists(meta_path):
+            os.remove(meta_path)  # store is invalid until close() succeeds
+        self._files = {}
+        for name, dtype in COLUMNS.items():
+            f = open(os.path.join(path, name + ".npy"), 'wb')
+            f.write(_npy_header(dtype, self._shape(name, 0)))
+            self._files[name] = f
+
+    def _shape(self, column, n_rows):
+        return (n_rows, len(self.feature_names)) if column == 'features' else (n_rows,)
+
+    def _code(self, table, value):
+        if value not in table:
+            table.append(value)
+        return table.index(value)
+
+    def append(self, features, labels, recording, subject=None):
+        """Append the windows of one recording (or one chunk of it)"""
+        features = np.asarray(features)
+        n = len(features)
+        if n == 0:
+            return
+        if features.shape[1] != len(self.feature_names):
+            raise ValueError(f"Expected {len(self.feature_names)} features, got {features.shape[1]}")
+        rec = self._code(self.recordings, recording)
+        subj = self._code(self.subjects, recording if subject is None else subject)
+        columns = {
+            'features': features,
+            'labels': labels,
+            'recording': np.full(n, rec),
+            'subject': np.full(n, subj),
+        }
+        for name, dtype in COLUMNS.items():
+            np.ascontiguousarray(columns[name], dtype=dtype).tofile(self._files[name])
+        self.n_rows += n
+
+    def close(self):
+        for name, f in self._files.items():
+            f.seek(0)
+            f.write(_npy_header(COLUMNS[name], self._shape(name, self.n_rows)))
+            f.close()
+        self._files = {}
+
+        meta = dict(self.metadata)
+        meta.update({
+            'store_version': STORE_VERSION,
+            'n_rows': self.n_rows,
+            'feature_names': self.feature_names,
+            'recordings': self.recordings,
+            'subjects': self.subjects,
+        })
+        tmp_path = os.path.join(self.path, META_FILE + ".tmp")
+        with open(tmp_path, 'w') as f:
+            json.dump(meta, f, indent=2)
+        os.replace(tmp_path, os.path.join(self.path, META_FILE))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            for f in self._files.values():
+                f.close()
+
+class FeatureStore:
+    """
+    Read access to a feature store. With mmap_mode='r' (default) the columns
+    are memory-mapped, so opening a store costs nothing until rows are touched.
+    """
+
+    def __init__(self, path, mmap_mode='r'):
+        meta_path = os.path.join(path, META_FILE)
+        if not os.path.exists(meta_path):
+            raise FileNotFoundError(f"No complete feature store at {path} (missing {META_FILE})")
+        with open(meta_path) as f:
+            self.meta = json.load(f)
+        if self.meta.get('store_version') != STORE_VERSION:
+            raise ValueError(f"Unsupported feature store version: {self.meta.get('store_version')}")
+
+        self.path = path
+        self.feature_names = self.meta['feature_names']
+        self.recording_names = self.meta['recordings']
+        self.subject_names = self.meta['subjects']
+        self.features = np.load(os.path.join(path, "features.npy"), mmap_mode=mmap_mode)
+        self.labels = np.load(os.path.join(path, "labels.npy"), mmap_mode=mmap_mode)
+        self.recordings = np.load(os.path.join(path, "recording.npy"), mmap_mode=mmap_mode)
+        self.subjects = np.load(os.path.join(path, "subject.npy"), mmap_mode=mmap_mode)
+
+    def __len__(self):
+        return self.meta['n_rows']
+
+    def iter_chunks(self, chunk_rows):
+        """
+        Yield {column: array} blocks of up to chunk_rows rows, read with plain
+        file I/O: unlike slices of the memory maps, pages already read don't
+        stay resident, so memory is bounded by one chunk
+        """
+        widths = {name: len(self.feature_names) if name == 'features' else 1 for name in COLUMNS}
+        files = {name: open(os.path.join(self.path, name + ".npy"), 'rb') for name in COLUMNS}
+        try:
+            for f in files.values():
+                f.seek(HEADER_LEN)
+            for start in range(0, len(self), chunk_rows):
+                n = min(chunk_rows, len(self) - start)
+                chunk = {}
+                for name, f in files.items():
+                    values = np.fromfile(f, dtype=COLUMNS[name], count=n * widths[name])
+                    chunk[name] = values.reshape(n, -1) if name == 'features' else values
+                yield chunk
+        finally:
+            for f in files.values():
+                f.close()
+
+def is_feature_store(path):
+    return os.path.isdir(path) and os.path.exists(os.path.join(path, META_FILE))
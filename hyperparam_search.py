@@ -0,0 +1,215 @@
+"""
+Hyperparameter search over the train_ml_model.py model families
+- Random configurations per family (SEARCH_SPACES) are scored by grouped
+  k-fold accuracy (train_ml_model.GroupedCV: no subject/recording straddles a
+  split, per-fold scalers computed once)
+- Successive halving: every configuration is first fitted on a small fraction
+  of each fold's training rows; only the best 1/eta go on to eta times the
+  rows, until the survivors are scored on the full folds
+- All (configuration, fold) fits of a rung run in parallel with joblib
+- Scores are cached on disk (JSON lines) keyed by configuration, budget, CV
+  setup and a fingerprint of the training data, so a re-run only evaluates
+  configurations that were not scored on the same data before
+- Prints and saves a leaderboard; the winner is refit on the full training
+  set, evaluated on the held-out test set and saved with save_model()
+"""
+
+import os
+import json
+import math
+import time
+import hashlib
+import argparse
+import numpy as np
+import pandas as pd
+from scipy.stats import loguniform
+from sklearn.model_selection import ParameterSampler
+
+from train_ml_model import (EEGModelTrainer, GroupedCV, make_model, plan_workers,
+                            CV_FOLDS, N_JOBS, BACKEND, GROUP_BY)
+
+CACHE_FILE = 'models/search_cache.jsonl'
+LEADERBOARD_FILE = 'results/leaderboard.csv'
+N_CONFIGS = 12  # sampled configurations per family
+ETA = 3  # keep the best 1/ETA of each rung, with ETA times its budget
+RUNGS = 3  # budgets 1/ETA**(RUNGS-1), ..., 1/ETA, 1
+HASH_BLOCK = 65536  # rows hashed at a time when fingerprinting data
+
+SEARCH_SPACES = {
+    'Logistic Regression': {
+        'C': loguniform(1e-3, 1e2),
+        'class_weight': [None, 'balanced'],
+    },
+    'Random Forest': {
+        'n_estimators': [100, 200, 400],
+        'max_depth': [None, 5, 10, 20],
+        'min_samples_leaf': [1, 2, 5, 10],
+        'max_features': ['sqrt', 0.5],
+    },
+    'Gradient Boosting': {
+        'n_estimators': [50, 100, 200],
+        'max_depth': [2, 3, 5],
+        'learning_rate': loguniform(0.02, 0.3),
+        'subsample': [0.7, 1.0],
+    },
+    'Hist Gradient Boosting': {
+        'max_iter': [100, 200, 400],
+        'max_depth': [None, 3, 5, 8],
+        'learning_rate': loguniform(0.02, 0.3),
+        'min_samples_leaf': [20, 50, 100],
+        'l2_regularization': loguniform(1e-4, 1.0),
+    },
+}
+
+def sample_configs(families, n_configs=N_CONFIGS, seed=42):
+    """[(family, params)] with n_configs random parameter sets per family"""
+    configs = []
+    for family in families:
+        for params in ParameterSampler(SEARCH_SPACES[family], n_configs, random_state=seed):
+            configs.append((family, {k: v.item() if isinstance(v, np.generic) else v
+                                     for k, v in params.items()}))
+    return configs
+
+def config_key(family, params):
+    return json.dumps({'family': family, 'params': params}, sort_keys=True)
+
+def build_model(family, params, n_threads=1):
+    return make_model(family, n_threads).set_params(**params)
+
+def data_fingerprint(X, y, groups=None):
+    """Hash of the training data (works block by block on memory-mapped arrays)"""
+    h = hashlib.blake2b(digest_size=16)
+    X = X.to_numpy() if isinstance(X, pd.DataFrame) else X
+    h.update(repr((X.shape, str(X.dtype))).encode())
+    for start in range(0, len(X), HASH_BLOCK):
+        h.update(np.ascontiguousarray(X[start:start + HASH_BLOCK]).tobytes())
+    h.update(np.ascontiguousarray(y).tobytes())
+    if groups is not None:
+        h.update(pd.util.hash_array(np.asarray(groups, dtype=object)).tobytes())
+    return h.hexdigest()
+
+class ScoreCache:
+    """(configuration, budget, CV setup, data) -> fold scores, appended to a JSON-lines file"""
+
+    def __init__(self, path=CACHE_FILE):
+        self.path = path
+        self.scores = {}
+        if path and os.path.exists(path):
+            with open(path) as f:
+                for line in f:
+                    if line.endswith('\n'):  # skip a line cut off by a crash
+                        entry = json.loads(line)
+                        self.scores[entry['key']] = entry
+
+    @staticmethod
+    def key(config_key, budget, cv_key):
+        return hashlib.sha1(f"{config_key}|{budget:.6g}|{cv_key}".encode()).hexdigest()
+
+    def get(self, key):
+        return self.scores.get(key)
+
+    def put(self, key, entry):
+        entry = dict(entry, key=key)
+        self.scores[key] = entry
+        if self.path:
+            os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+            with open(self.path, 'a') as f:
+                f.write(json.dumps(entry) + '\n')
+
+def successive_halving(cv, configs, cache, cv_key, eta=ETA, rungs=RUNGS, n_jobs=N_JOBS, backend=BACKEND):
+    """
+    Score configs on growing budgets, keeping the best 1/eta per rung.
+    Returns one leaderboard row per configuration (its last rung reached).
+    """
+    rows = {config_key(*config): {'family': config[0], 'params': config[1]} for config in configs}
+    alive = list(rows)
+    for rung in range(rungs):
+        budget = eta ** (rung - rungs + 1)
+        todo = []
+        for key in alive:
+            cached = cache.get(ScoreCache.key(key, budget, cv_key))
+            if cached is not None:
+                rows[key].update(cached['result'], cached=True)
+            else:
+                todo.append(key)
+        n_tasks = len(todo) * len(cv.splits)
+        workers, threads = plan_workers(n_jobs, n_tasks)
+        start = time.perf_counter()
+        if todo:
+            models = {key: build_model(rows[key]['family'], rows[key]['params'], threads) for key in todo}
+            for key, (acc, fit_sec, cpu_sec) in cv.evaluate(models, workers, backend, budget).items():
+                result = {'budget': budget, 'cv_acc': float(acc.mean()), 'cv_std': float(acc.std()),
+                          'fit_sec': float(fit_sec.sum()), 'cpu_sec': float(cpu_sec.sum())}
+                rows[key].update(result, cached=False)
+                cache.put(ScoreCache.key(key, budget, cv_key), {'config': key, 'result': result})
+        print(f"Rung {rung + 1}/{rungs}: {len(alive)} configs on {budget:.0%} of the fold rows, "
+              f"{len(todo)} evaluated ({len(alive) - len(todo)} cached) in {time.perf_counter() - start:.1f}s")
+        alive.sort(key=lambda k: rows[k]['cv_acc'], reverse=True)
+        if rung < rungs - 1:
+            alive = alive[:max(1, math.ceil(len(alive) / eta))]
+    return list(rows.values())
+
+def leaderboard(rows):
+    """Configurations ranked by budget reached, then CV accuracy"""
+    df = pd.DataFrame(rows)
+    df['params'] = df['params'].map(lambda p: json.dumps(p, sort_keys=True))
+    df = df.sort_values(['budget', 'cv_acc'], ascending=False).reset_index(drop=True)
+    df.index += 1
+    return df[['family', 'cv_acc', 'cv_std', 'budget', 'fit_sec', 'cpu_sec', 'cached', 'params']]
+
+def main():
+    parser = argparse.ArgumentParser(description="Successive-halving hyperparameter search")
+    parser.add_argument("data", nargs="?", help="feature store or CSV (default as train_ml_model.py)")
+    parser.add_argument("--families", nargs="+", default=list(SEARCH_SPACES), choices=list(SEARCH_SPACES))
+    parser.add_argument("--configs", type=int, default=N_CONFIGS, help="random configurations per family")
+    parser.add_argument("--eta", type=int, default=ETA)
+    parser.add_argument("--rungs", type=int, default=RUNGS)
+    parser.add_argument("--cv", type=int, default=CV_FOLDS)
+    parser.add_argument("--jobs", type=int, default=N_JOBS)
+    parser.add_argument("--backend", default=BACKEND, choices=['loky', 'multiprocessing', 'threading'])
+    parser.add_argument("--group-by", default=GROUP_BY, choices=['subject', 'recording', 'none'])
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--fast", action="store_true", help="float32 features (as train_ml_model.py --fast)")
+    parser.add_argument("--cache", default=CACHE_FILE, help="score cache ('' to disable)")
+    parser.add_argument("--no-save", action="store_true", help="don't refit and save the winner")
+    args = parser.parse_args()
+
+    trainer = EEGModelTrainer(None if args.group_by == 'none' else args.group_by, args.fast)
+    X, y, _ = trainer.load_data(args.data)
+    if X is None:
+        return
+    X_train, X_test, y_train, y_test = trainer.split(X, y)
+
+    print("\n" + "="*60)
+    print("HYPERPARAMETER SEARCH")
+    print("="*60)
+    cv = GroupedCV(X_train, y_train, trainer.train_groups, args.cv)
+    cv_key = f"{data_fingerprint(cv.X, cv.y, cv.groups)}|{args.cv}|{args.group_by}"
+    cache = ScoreCache(args.cache)
+    configs = sample_configs(args.families, args.configs, args.seed)
+    print(f"{len(configs)} configurations, {len(cv.splits)} folds, eta={args.eta}, {args.rungs} rungs"
+          f" ({len(cache.scores)} cached scores)")
+    start = time.perf_counter()
+    board = leaderboard(successive_halving(cv, configs, cache, cv_key, args.eta, args.rungs,
+                                           args.jobs, args.backend))
+    print(f"Search took {time.perf_counter() - start:.1f}s\n")
+    with pd.option_context('display.max_colwidth', 80, 'display.width', 200):
+        print(board.head(15).to_string())
+    os.makedirs(os.path.dirname(LEADERBOARD_FILE), exist_ok=True)
+    board.to_csv(LEADERBOARD_FILE, index_label='rank')
+    print(f"✓ Leaderboard saved to {LEADERBOARD_FILE}")
+
+    if args.no_save:
+        return
+    winner = board.iloc[0]
+    params = json.loads(winner['params'])
+    print(f"\nWinner: {winner['family']} {params} (CV {winner['cv_acc']:.3f} ± {winner['cv_std']:.3f})")
+    X_train, X_test = trainer.normalize(X_train, X_test)
+    _, threads = plan_workers(args.jobs, 1)
+    model = build_model(winner['family'], params, threads).fit(X_train, y_train)
+    trainer.models = {winner['family']: model}
+    trainer.evaluate_models(X_train, X_test, y_train, y_test)
+    trainer.save_model(winner['family'], model)
+
+if __name__ == "__main__":
+    main()
@@ -1,15 +1,26 @@
-import threading
 from datetime import datetime
 import os 
-import sys # Import sys for better error handling
+import re
+import time
+import struct
+import argparse
+import threading
 
 import eventlet
 import socketio
-from pythonosc.dispatcher import Dispatcher
-from pythonosc.osc_server import BlockingOSCUDPServer
+import numpy as np
+
+try:
+    import msgpack  # optional: compact binary frames for clients that ask for them
+except ImportError:
+    msgpack = None
+
+from osc_ingest import OSCIngest
 
 # --- File Configuration ---
 CLIENT_FILENAME = 'EEG_Adaptive_Interface_HTMLVERSION.html' # CORRECTED FILE NAME!
+BROADCAST_HZ = 20  # frames per second pushed to clients (latest values, coalesced)
+DEBUG_LOG = os.environ.get("MUSE_RELAY_DEBUG") == "1"  # per-message console logging (slow)
 # --------------------------
 
 
@@ -32,115 +43,234 @@ app = socketio.WSGIApp(
     },
 )
 
-# --- Socket.IO Event Emitters ---
-def send_alpha_absolute(value):
-    sio.emit("alpha_absolute", value)
-
-def send_alpha_relative(value):
-    sio.emit("alpha_relative", value)
-
-def send_beta_absolute(value):
-    sio.emit("beta_absolute", value)
+# --- OSC -> Socket.IO Bridge ---
+
+BANDS = ("delta", "theta", "alpha", "beta", "gamma")
+EEG_CHANNELS = 4  # TP9, AF7, AF8, TP10; any extra (aux) values in /muse/eeg are dropped
+EEG_BUFFER_SEC = 2  # raw samples kept between frames; older ones are dropped, never queued
+MUSE_EEG_RATE = 256
+
+# Route table: (address regex, channel name template, kind)
+#   value   latest mean of the message's finite values (per-sensor band powers)
+#   vector  latest list of values (horseshoe fit per sensor)
+#   event   number of messages since the last frame (blinks, jaw clenches)
+#   stream  every sample, sent as a binary "eeg" event
+ROUTES = [
+    (r"/muse/elements/(delta|theta|alpha|beta|gamma)_(absolute|relative)", r"\1_\2", "value"),
+    (r"/muse/elements/horseshoe", "horseshoe", "vector"),
+    (r"/muse/elements/touching_forehead", "touching_forehead", "value"),
+    (r"/muse/elements/(blink|jaw_clench)", r"\1", "event"),
+    (r"/muse/eeg", "eeg", "stream"),
+]
+ROUTES = [(re.compile(pattern + "$"), template, kind) for pattern, template, kind in ROUTES]
+
+CHANNELS = tuple(f"{band}_{kind}" for band in BANDS for kind in ("absolute", "relative")) + (
+    "horseshoe", "touching_forehead", "blink", "jaw_clench", "eeg")
+DEFAULT_CHANNELS = tuple(c for c in CHANNELS if c != "eeg")  # raw EEG is opt-in
+
+# "eeg" event payload: little-endian header then float32 samples, row-major
+# (n_samples, n_channels); the 16-byte header keeps the samples 4-byte aligned
+# so browsers can read them with new Float32Array(buffer, 16)
+EEG_HEADER = struct.Struct("<dIHH")  # time of last sample, n_samples, n_channels, dropped since last frame
+
+
+_routed = {}  # matched addresses only (a fixed set), so stray OSC traffic can't grow it
+
+
+def route(address):
+    """(channel, kind) for an OSC address, or None; cached per matched address"""
+    hit = _routed.get(address)
+    if hit is None:
+        for regex, template, kind in ROUTES:
+            match = regex.match(address)
+            if match:
+                hit = _routed[address] = (match.expand(template), kind)
+                break
+    return hit
+
+
+def to_values(args):
+    """Finite floats from OSC args, unwrapping the single tuple TouchDesigner sometimes sends"""
+    if len(args) == 1 and isinstance(args[0], (list, tuple)):
+        args = args[0]
+    values = []
+    for a in args:
+        try:
+            v = float(a)
+        except (TypeError, ValueError):
+            continue
+        if v == v:
+            values.append(v)
+    return values
+
+
+class FrameBroadcaster:
+    """
+    Keeps only the latest value per channel and pushes one "frame" event per
+    tick (BROADCAST_HZ) holding the channels that changed since the last one,
+    plus one binary "eeg" event with the raw samples received since then.
+
+    Clients receive DEFAULT_CHANNELS as JSON on connect. A "subscribe" event
+    with {"channels": [...], "binary": true} picks channels (add "eeg" for raw
+    samples) and/or asks for msgpack-encoded frames. Clients with the same
+    subscription share a Socket.IO room, so each distinct frame is encoded and
+    emitted once per tick however many clients are connected.
+    """
 
-def send_beta_relative(value):
-    sio.emit("beta_relative", value)
+    def __init__(self, sio, rate=BROADCAST_HZ):
+        self.sio = sio
+        self.interval = 1.0 / rate
+        self.latest = {}
+        self.changed = set()
+        self.events = {}
+        self.eeg = np.empty((EEG_BUFFER_SEC * MUSE_EEG_RATE, EEG_CHANNELS), dtype=np.float32)
+        self.eeg_count = 0
+        self.eeg_dropped = 0
+        self.eeg_time = 0.0
+        self.rooms = {}  # room name -> [channels, binary, n_clients]
+        self.client_room = {}  # sid -> room name
+        self._lock = threading.Lock()  # handle() runs on the OSC ingest thread
+
+    def handle(self, messages):
+        """OSCIngest batch handler: route a burst of (address, args) messages"""
+        now = time.time()
+        with self._lock:
+            for address, args in messages:
+                target = route(address)
+                if target is None:
+                    continue
+                channel, kind = target
+                if DEBUG_LOG:
+                    print(f"Received: {address}, Values: {args}")
+                if kind == "stream":
+                    self._push_eeg(args, now)
+                    continue
+                values = to_values(args)
+                if not values:
+                    continue
+                if kind == "value":
+                    self.latest[channel] = sum(values) / len(values)
+                elif kind == "vector":
+                    self.latest[channel] = values
+                else:
+                    self.events[channel] = self.events.get(channel, 0) + 1
+                self.changed.add(channel)
+
+    def _push_eeg(self, args, now):
+        if len(args) < EEG_CHANNELS:
+            return
+        if self.eeg_count == len(self.eeg):
+            # Nobody drained for EEG_BUFFER_SEC: drop the oldest half rather than build a backlog
+            half = len(self.eeg) // 2
+            self.eeg[:half] = self.eeg[half:]
+            self.eeg_count -= half
+            self.eeg_dropped += half
+        self.eeg[self.eeg_count] = args[:EEG_CHANNELS]
+        self.eeg_count += 1
+        self.eeg_time = now
+
+    def subscribe(self, sid, channels=DEFAULT_CHANNELS, binary=False):
+        channels = tuple(c for c in CHANNELS if c in channels)
+        binary = bool(binary) and msgpack is not None
+        room = f"{'msgpack' if binary else 'json'}:{','.join(channels)}"
+        self.unsubscribe(sid)
+        self.rooms.setdefault(room, [channels, binary, 0])[2] += 1
+        self.client_room[sid] = room
+        self.sio.enter_room(sid, room)
+        return {"channels": list(channels), "binary": binary, "rate": 1.0 / self.interval}
+
+    def unsubscribe(self, sid):
+        room = self.client_room.pop(sid, None)
+        if room is None:
+            return
+        self.sio.leave_room(sid, room)
+        self.rooms[room][2] -= 1
+        if not self.rooms[room][2]:
+            del self.rooms[room]
+
+    def tick(self):
+        with self._lock:
+            frame = {c: self.latest[c] for c in self.changed if c in self.latest}
+            frame.update(self.events)
+            self.changed = set()
+            self.events = {}
+            eeg = None
+            if self.eeg_count:
+                eeg = EEG_HEADER.pack(self.eeg_time, self.eeg_count, EEG_CHANNELS, self.eeg_dropped) \
+                    + self.eeg[:self.eeg_count].tobytes()
+                self.eeg_count = 0
+                self.eeg_dropped = 0
+        if not frame and eeg is None:
+            return
+        now = time.time()
+        for room, (channels, binary, _) in list(self.rooms.items()):
+            payload = {c: frame[c] for c in channels if c in frame}
+            if payload:
+                payload["t"] = now
+                self.sio.emit("frame", msgpack.packb(payload) if binary else payload, room=room)
+            if eeg is not None and "eeg" in channels:
+                self.sio.emit("eeg", eeg, room=room)
+
+    def run(self):
+        """Background task on the Socket.IO server's event loop"""
+        next_tick = time.monotonic()
+        while True:
+            self.tick()
+            next_tick += self.interval
+            self.sio.sleep(max(0.0, next_tick - time.monotonic()))
+
+
+broadcaster = FrameBroadcaster(sio)
 
 
 @sio.event
 def connect(sid, environ):
     """Handles new client connections."""
+    broadcaster.subscribe(sid)
     print(f"Client connected: {sid} at {datetime.now().strftime('%H:%M:%S')}")
 
 
 @sio.event
 def disconnect(sid):
     """Handles client disconnections."""
+    broadcaster.unsubscribe(sid)
     print(f"Client disconnected: {sid} at {datetime.now().strftime('%H:%M:%S')}")
 
 
-# --- OSC Handlers (MODIFIED FOR ROBUSTNESS) ---
+@sio.event
+def subscribe(sid, data):
+    """Choose channels and encoding: {"channels": [...], "binary": bool}; acks the result."""
+    data = data or {}
+    return broadcaster.subscribe(sid, data.get("channels") or DEFAULT_CHANNELS, data.get("binary", False))
 
-def generic_handler(address, handler_func, *args):
-    """
-    A generic handler to parse OSC arguments and call the appropriate Socket.IO sender.
-    This is updated to be robust against single-item lists/tuples often sent by TouchDesigner.
-    """
-    if not args:
-        print(f"Warning: Received OSC message on {address} with no arguments.")
-        return
-
-    # Attempt to extract the first argument, handling cases where it might be wrapped.
-    try:
-        # If the first item is iterable (like a list/tuple) and has items, use the first item in it.
-        # This handles the common TouchDesigner case where a single value is sent as a tuple.
-        if isinstance(args[0], (list, tuple)) and args[0]:
-            value_candidate = args[0][0]
-        else:
-            value_candidate = args[0]
-            
-        value = float(value_candidate)
-        
-        # Confirmation print for debugging
-        print(f"Received: {address}, Value: {value:.4f}") 
-        
-        handler_func(value)
-        
-    except ValueError:
-        # Catch errors if the argument cannot be converted to a float
-        print(f"Error: Could not convert OSC value '{value_candidate}' to float for {address}.", file=sys.stderr)
-    except Exception as e:
-        # Catch any other unexpected error
-        print(f"Unexpected error processing OSC message on {address}: {e}", file=sys.stderr)
-
-
-def alpha_absolute_osc_handler(address, *args):
-    # Only map the required addresses
-    if address == "/muse/elements/alpha_absolute":
-        generic_handler(address, send_alpha_absolute, *args)
-
-def alpha_relative_osc_handler(address, *args):
-    # Only map the required addresses
-    if address == "/muse/elements/alpha_relative":
-        generic_handler(address, send_alpha_relative, *args)
-
-def beta_absolute_osc_handler(address, *args):
-    # Only map the required addresses
-    if address == "/muse/elements/beta_absolute":
-        generic_handler(address, send_beta_absolute, *args)
-
-def beta_relative_osc_handler(address, *args):
-    # Only map the required addresses
-    if address == "/muse/elements/beta_relative":
-        generic_handler(address, send_beta_relative, *args)
-
-
-# --- OSC Dispatcher and Server Setup ---
-
-dispatcher = Dispatcher()
-# Map the specific addresses we want to receive
-dispatcher.map("/muse/elements/alpha_absolute", alpha_absolute_osc_handler)
-dispatcher.map("/muse/elements/alpha_relative", alpha_relative_osc_handler)
-dispatcher.map("/muse/elements/beta_absolute", beta_absolute_osc_handler)
-dispatcher.map("/muse/elements/beta_relative", beta_relative_osc_handler)
-
-# OSC server listens on UDP port 9001 on all interfaces
-osc_server = BlockingOSCUDPServer(("0.0.0.0", 9001), dispatcher)
+
+# --- OSC Ingest Setup ---
+
+# OSC ingest listens on UDP port 9001 on all interfaces; bursts are drained, parsed
+# and routed in batches
+osc_ingest = OSCIngest()
+osc_ingest.listen(9001, broadcaster.handle)
 
 
 def run_osc():
-    """Function to run the OSC server in its own thread."""
+    """Start the OSC ingest loop on its own thread."""
     print("OSC server listening on port 9001 (UDP)...")
-    try:
-        osc_server.serve_forever()
-    except Exception as e:
-        print(f"OSC Server Error: {e}")
+    osc_ingest.start()
 
 
 # --- Main Execution ---
 
 if __name__ == "__main__":
-    # Start the OSC server in a background thread
-    threading.Thread(target=run_osc, daemon=True).start()
+    parser = argparse.ArgumentParser(description="Relay Muse OSC streams to Socket.IO clients")
+    parser.add_argument("--rate", type=float, default=BROADCAST_HZ, help="frames per second sent to clients")
+    parser.add_argument("--debug", action="store_true", help="log every received OSC message")
+    args = parser.parse_args()
+    DEBUG_LOG = DEBUG_LOG or args.debug
+    broadcaster.interval = 1.0 / args.rate
+    sio.start_background_task(broadcaster.run)
+
+    # Start the OSC ingest loop (it runs on a background thread)
+    run_osc()
 
     print("WebSocket (Socket.IO) server running on port 5670(HTTP)...")
     # Start the Socket.IO web server
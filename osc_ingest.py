@@ -0,0 +1,159 @@
+"""
+Batched OSC ingestion shared by app.py, muse2_html_python_server.py and
+EEG_Adaptive_Interface.py
+- One asyncio loop (one thread) serves any number of UDP ports
+- Each time a socket becomes readable it is drained (up to max_batch
+  datagrams) and the whole burst is parsed and handed to the port's handler
+  as one list of (address, args) messages, instead of one callback (or one
+  thread, with ThreadingOSCUDPServer) per datagram
+- Plain messages with float/int/double/int64 arguments - everything the Muse
+  streams - are parsed with one cached struct per type tag string; anything
+  else (strings, blobs, bundles) falls back to python-osc
+"""
+
+import socket
+import struct
+import asyncio
+import threading
+from pythonosc.osc_bundle import OscBundle
+from pythonosc.osc_message import OscMessage
+
+MAX_BATCH = 1024  # datagrams drained per readiness event
+RCVBUF = 4 * 1024 * 1024  # UDP receive buffer: absorbs bursts between drains
+MAX_DATAGRAM = 65536
+
+_TAG_FORMATS = {ord('f'): 'f', ord('i'): 'i', ord('d'): 'd', ord('h'): 'q'}
+_structs = {}  # type tags -> struct.Struct, or None when python-osc must parse them
+
+def _args_struct(tags):
+    if tags not in _structs:
+        fmt = [_TAG_FORMATS.get(t) for t in tags]
+        _structs[tags] = None if None in fmt else struct.Struct('>' + ''.join(fmt))
+    return _structs[tags]
+
+def parse_packet(data, out):
+    """Append the (address, args) messages in one OSC datagram to out"""
+    if data[:1] == b'#':
+        for content in OscBundle(data):
+            _append_parsed(content, out)
+        return
+    end = data.index(b'\0')
+    address = data[:end].decode('ascii')
+    i = (end + 4) & ~3
+    if data[i:i + 1] != b',':
+        out.append((address, ()))
+        return
+    tags_end = data.index(b'\0', i)
+    args_struct = _args_struct(data[i + 1:tags_end])
+    if args_struct is None:
+        out.append((address, tuple(OscMessage(data).params)))
+    else:
+        out.append((address, args_struct.unpack_from(data, (tags_end + 4) & ~3)))
+
+def _append_parsed(content, out):
+    if isinstance(content, OscBundle):
+        for c in content:
+            _append_parsed(c, out)
+    else:
+        out.append((content.address, tuple(content.params)))
+
+def by_address(handlers):
+    """
+    Batch handler calling dispatcher-style handler(address, *args) for every
+    message whose address is a key of handlers (exact match; others ignored)
+    """
+    def handle(messages):
+        for address, args in messages:
+            handler = handlers.get(address)
+            if handler is not None:
+                handler(address, *args)
+    return handle
+
+class OSCIngest:
+    """
+    OSC receiver for one or more UDP ports. listen() registers a port and a
+    batch handler(messages); start() runs the loop on a daemon thread. All
+    handlers run on that one thread.
+    """
+
+    def __init__(self, max_batch=MAX_BATCH, rcvbuf=RCVBUF):
+        self.max_batch = max_batch
+        self.rcvbuf = rcvbuf
+        self.loop = None
+        self.thread = None
+        self._endpoints = []
+        self.packets = 0
+        self.messages = 0
+        self.batches = 0
+        self.errors = 0
+
+    def listen(self, port, handler, ip="0.0.0.0"):
+        """Bind a port (0 picks a free one) before start(); returns the bound port"""
+        if self.loop is not None:
+            raise RuntimeError("listen() must be called before start()")
+        sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, self.rcvbuf)
+        sock.bind((ip, port))
+        sock.setblocking(False)
+        self._endpoints.append((sock, handler))
+        return sock.getsockname()[1]
+
+    def _drain(self, sock, handler):
+        messages = []
+        n = 0
+        while n < self.max_batch:
+            try:
+                data = sock.recv(MAX_DATAGRAM)
+            except (BlockingIOError, InterruptedError):
+                break
+            except OSError:  # e.g. ICMP port unreachable reported on Windows
+                self.errors += 1
+                break
+            n += 1
+            try:
+                parse_packet(data, messages)
+            except Exception:
+                self.errors += 1  # malformed datagram: skip it, keep the rest of the burst
+        if not n:
+            return
+        self.packets += n
+        self.messages += len(messages)
+        self.batches += 1
+        if messages:
+            try:
+                handler(messages)
+            except Exception as e:
+                self.errors += 1
+                print(f"⚠ OSC handler failed: {e}")
+
+    def run_forever(self):
+        """Serve every listened port on the calling thread"""
+        if self.loop is None:
+            # Selector loop explicitly: add_reader is not available on Windows' default proactor loop
+            self.loop = asyncio.SelectorEventLoop()
+        for sock, handler in self._endpoints:
+            self.loop.add_reader(sock, self._drain, sock, handler)
+        try:
+            self.loop.run_forever()
+        finally:
+            for sock, _ in self._endpoints:
+                self.loop.remove_reader(sock)
+                sock.close()
+            self.loop.close()
+
+    def start(self):
+        self.loop = asyncio.SelectorEventLoop()  # created here so stop() works right away
+        self.thread = threading.Thread(target=self.run_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        if self.loop is not None:
+            self.loop.call_soon_threadsafe(self.loop.stop)
+        if self.thread is not None:
+            self.thread.join()
+
+    def stats(self):
+        return {'packets': self.packets, 'messages': self.messages, 'batches': self.batches,
+                'mean_batch': round(self.packets / self.batches, 2) if self.batches else 0,
+                'errors': self.errors}
@@ -1,23 +1,42 @@
 """
-EEG Preprocessing Script (CSV version)
+EEG Preprocessing Script
 - Loads .mat files
 - Extracts EEG features and labels
 - Splits into windows
-- Saves processed features as CSV
+- Caches features per recording (data/feature_cache) so reruns only process new files
+- Saves processed features as a binary feature store (default) or CSV
 """
 
 import os
+import time
+import json
+import hashlib
+import argparse
+from itertools import islice
+from collections import deque
+from functools import partial
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 import numpy as np
 import pandas as pd
 from scipy.io import loadmat
 
+from feature_store import FeatureStoreWriter
+from eeg_features import (
+    WINDOW_SIZE, STEP_SIZE, SAMPLING_RATE, WELCH_NPERSEG, FEATURE_SET_VERSION,
+    DEFAULT_FEATURE_SET, FEATURES, FeaturePipeline, check_feature_set, sliding_windows,
+    extract_feature_set, features_per_channel, feature_names,
+)
+
 # Folder containing .mat EEG files
 DATA_FOLDER = "data/EEG Data"
 OUTPUT_FILE = "data/processed_features.csv"
+OUTPUT_STORE = "data/processed_features"  # binary feature store (see feature_store.py)
+SUBJECTS_FILE = "data/subjects.json"  # optional {"eeg_record1": "subject_a", ...}
+CACHE_DIR = "data/feature_cache"  # one .npz of features per recording
 
-# Parameters
-WINDOW_SIZE = 128  # samples per window
-STEP_SIZE = 64     # overlap
+# Parameters (window size, step and features live in eeg_features.py)
+MAX_PENDING_PER_WORKER = 2  # files queued/finished but not yet written, per worker
 
 def extract_features_from_eeg(eeg_data):
     """
@@ -36,69 +55,368 @@ def extract_features_from_eeg(eeg_data):
         ])
     return features
 
+def majority_labels(labels, window_size=WINDOW_SIZE, step_size=STEP_SIZE):
+    """Majority (0/1) label of every sliding window"""
+    label_windows = np.ascontiguousarray(sliding_windows(labels, window_size, step_size))
+    return (label_windows.sum(axis=1) > (window_size / 2)).astype(int)
+
+def window_features(eeg, labels, feature_set=DEFAULT_FEATURE_SET):
+    """Features and majority labels for every window of one recording"""
+    return extract_feature_set(sliding_windows(eeg), feature_set), majority_labels(labels)
+
+def window_features_loop(eeg, labels):
+    """
+    Reference per-window implementation (kept for benchmarking and
+    verifying the batched path)
+    """
+    windows = []
+    window_labels = []
+
+    # Sliding windows
+    for start in range(0, len(eeg)-WINDOW_SIZE+1, STEP_SIZE):
+        end = start + WINDOW_SIZE
+        eeg_win = eeg[start:end, :]
+        label_win = labels[start:end]
+        # Majority label in window
+        label = 1 if np.sum(label_win) > (WINDOW_SIZE/2) else 0
+        feat = extract_features_from_eeg(eeg_win)
+        windows.append(feat)
+        window_labels.append(label)
+
+    return np.array(windows), np.array(window_labels)
+
+def read_mat_recording(file_path):
+    """Return (eeg, labels) arrays from a single .mat file"""
+    mat = loadmat(file_path)
+    o = mat['o'][0,0]  # adjust if needed
+
+    eeg = o[4]          # EEG data: (n_samples, n_channels)
+    labels = o[3].flatten()  # 0/1 labels per sample
+    return eeg, labels
+
 def load_mat_file(file_path):
     """
     Load a single .mat file and extract features/labels
     """
     try:
-        mat = loadmat(file_path)
-        o = mat['o'][0,0]  # adjust if needed
+        eeg, labels = read_mat_recording(file_path)
+        return window_features(eeg, labels)
+
+    except Exception as e:
+        print(f"⚠ Could not extract EEG from {file_path}: {e}")
+        return None, None
+
+def recording_name(file_path):
+    return os.path.splitext(os.path.basename(file_path))[0]
 
-        eeg = o[4]          # EEG data: (n_samples, n_channels)
-        labels = o[3].flatten()  # 0/1 labels per sample
+def load_subjects(subjects_file=SUBJECTS_FILE):
+    """Recording -> subject map; recordings missing from it are their own subject"""
+    if not os.path.exists(subjects_file):
+        return {}
+    with open(subjects_file) as f:
+        return json.load(f)
 
-        windows = []
-        window_labels = []
+def features_to_dataframe(X, y, recordings=None, subjects=None, feature_set=DEFAULT_FEATURE_SET):
+    n_channels = X.shape[1] // features_per_channel(feature_set)
+    df = pd.DataFrame(X, columns=feature_names(n_channels, feature_set))
+    df['label'] = y
+    if recordings is not None:
+        df['recording'] = recordings
+        df['subject'] = recordings if subjects is None else subjects
+    return df
+
+def file_digest(file_path, chunk_size=1 << 20):
+    """SHA-256 of a file's contents"""
+    h = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            h.update(chunk)
+    return h.hexdigest()
+
+def cache_key(digest, feature_set=DEFAULT_FEATURE_SET):
+    """Cache key: file contents + everything that changes the extracted features"""
+    key = f"{digest}-w{WINDOW_SIZE}-s{STEP_SIZE}-v{FEATURE_SET_VERSION}-{'+'.join(feature_set)}"
+    if 'bands' in feature_set:
+        key += f"-fs{SAMPLING_RATE}-n{WELCH_NPERSEG}"
+    return key
 
-        # Sliding windows
-        for start in range(0, len(eeg)-WINDOW_SIZE+1, STEP_SIZE):
-            end = start + WINDOW_SIZE
-            eeg_win = eeg[start:end, :]
-            label_win = labels[start:end]
-            # Majority label in window
-            label = 1 if np.sum(label_win) > (WINDOW_SIZE/2) else 0
-            feat = extract_features_from_eeg(eeg_win)
-            windows.append(feat)
-            window_labels.append(label)
+def cache_path(cache_dir, file_path):
+    name = os.path.splitext(os.path.basename(file_path))[0]
+    return os.path.join(cache_dir, name + ".npz")
 
-        return np.array(windows), np.array(window_labels)
+def read_cache(cache_file, key):
+    """Cached (features, labels) if the entry exists and matches key, else None"""
+    if not os.path.exists(cache_file):
+        return None
+    try:
+        with np.load(cache_file) as entry:
+            if str(entry['key']) != key:
+                return None
+            return entry['features'], entry['labels']
+    except Exception:
+        return None  # unreadable entry is treated as a miss and rewritten
+
+def write_cache(cache_file, key, feats, labs):
+    tmp_file = cache_file + ".tmp"
+    with open(tmp_file, 'wb') as f:
+        np.savez_compressed(f, key=np.array(key), features=feats, labels=labs)
+    os.replace(tmp_file, cache_file)  # atomic, so a killed run never leaves a half entry
 
+def prune_cache(cache_dir, paths):
+    """Delete cache entries whose recording no longer exists; returns count"""
+    if not os.path.isdir(cache_dir):
+        return 0
+    keep = {os.path.basename(cache_path(cache_dir, p)) for p in paths}
+    removed = 0
+    for f in os.listdir(cache_dir):
+        if f not in keep:  # also clears .tmp files left by an interrupted run
+            os.remove(os.path.join(cache_dir, f))
+            removed += 1
+    return removed
+
+def process_file(file_path, cache_dir=None, rebuild=False, feature_set=DEFAULT_FEATURE_SET):
+    """
+    Load and window one recording, never raising.
+    Returns (features, labels, seconds, error, cache_hit) so it can run in a
+    worker process. With a cache_dir, features are reused when the file's
+    content hash and extraction parameters match the cached entry.
+    """
+    start = time.perf_counter()
+    try:
+        key = cache_file = None
+        if cache_dir is not None:
+            key = cache_key(file_digest(file_path), feature_set)
+            cache_file = cache_path(cache_dir, file_path)
+            cached = None if rebuild else read_cache(cache_file, key)
+            if cached is not None:
+                return cached + (time.perf_counter() - start, None, True)
+
+        # Whole recording at once: loadmat has no partial reads, and the
+        # recording's feature matrix is needed in full anyway (pickled back
+        # from a worker, cached as one .npz), so chunking it would only add a
+        # concatenate. Memory is bounded per recording by process_all_mat_files.
+        eeg, labels = read_mat_recording(file_path)
+        if len(eeg) >= WINDOW_SIZE:
+            feats, labs = window_features(eeg, labels, feature_set)
+        else:
+            feats = np.empty((0, features_per_channel(feature_set) * eeg.shape[1]))
+            labs = np.empty(0, dtype=int)
+        del eeg, labels
+        if cache_file is not None:
+            write_cache(cache_file, key, feats, labs)
+        return feats, labs, time.perf_counter() - start, None, False
     except Exception as e:
-        print(f"⚠ Could not extract EEG from {file_path}: {e}")
-        return None, None
+        return None, None, time.perf_counter() - start, str(e), False
 
-def load_all_mat_files(folder):
+def iter_processed_files(paths, workers=1, cache_dir=None, rebuild=False,
+                         feature_set=DEFAULT_FEATURE_SET):
     """
-    Load all .mat files and combine into one DataFrame
+    Yield (path, features, labels, seconds, error, cache_hit) for every path,
+    in the order given. With workers > 1 the files are fanned out to a process
+    pool and results are streamed back as soon as the next file in order is done.
+    Only a few files per worker are in flight at once, so results never pile up
+    in memory while the consumer is writing. If a worker dies (e.g. killed
+    for memory), the files in flight are reported as failed and the rest go
+    to a new pool.
     """
-    all_features = []
-    all_labels = []
+    process = partial(process_file, cache_dir=cache_dir, rebuild=rebuild, feature_set=feature_set)
+    if workers <= 1:
+        for path in paths:
+            yield (path,) + process(path)
+        return
+
+    paths = iter(paths)
+    pool = ProcessPoolExecutor(max_workers=workers)
+
+    def submit(path):
+        nonlocal pool
+        try:
+            return pool.submit(process, path)
+        except BrokenProcessPool:
+            pool.shutdown(wait=False)
+            pool = ProcessPoolExecutor(max_workers=workers)
+            return pool.submit(process, path)
+
+    try:
+        pending = deque((p, submit(p)) for p in islice(paths, workers * MAX_PENDING_PER_WORKER))
+        while pending:
+            path, future = pending.popleft()
+            start = time.perf_counter()
+            try:
+                result = future.result()
+            except BrokenProcessPool:
+                result = (None, None, time.perf_counter() - start,
+                          "worker process died (out of memory?)", False)
+            next_path = next(paths, None)
+            if next_path is not None:
+                pending.append((next_path, submit(next_path)))
+            yield (path,) + result
+    finally:
+        pool.shutdown()
+
+class CSVFeatureWriter:
+    """Appends windows to a CSV one recording at a time (same output as df.to_csv)"""
+
+    def __init__(self, path, feature_set=DEFAULT_FEATURE_SET):
+        self.path = path
+        self.feature_set = feature_set
+        self.n_rows = 0
+        self._tmp_path = path + ".tmp"
+        self._file = open(self._tmp_path, 'w', newline='')
+
+    def append(self, features, labels, recording, subject=None):
+        n = len(labels)
+        df = features_to_dataframe(features, labels, [recording] * n,
+                                   [recording if subject is None else subject] * n, self.feature_set)
+        df.to_csv(self._file, header=self.n_rows == 0, index=False)
+        self.n_rows += n
+
+    def close(self):
+        self._file.close()
+        os.replace(self._tmp_path, self.path)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self._file.close()
+
+class DataFrameCollector:
+    """Collects windows in memory and builds one DataFrame at the end"""
+
+    def __init__(self, feature_set=DEFAULT_FEATURE_SET):
+        self.feature_set = feature_set
+        self.features, self.labels, self.recordings, self.subjects = [], [], [], []
+        self.n_rows = 0
+
+    def append(self, features, labels, recording, subject=None):
+        self.features.append(features)
+        self.labels.append(labels)
+        self.recordings.append(np.full(len(labels), recording, dtype=object))
+        self.subjects.append(np.full(len(labels), recording if subject is None else subject, dtype=object))
+        self.n_rows += len(labels)
+
+    def to_dataframe(self):
+        return features_to_dataframe(np.vstack(self.features), np.concatenate(self.labels),
+                                     np.concatenate(self.recordings), np.concatenate(self.subjects),
+                                     self.feature_set)
+
+def process_all_mat_files(folder, writer, workers=1, cache_dir=None, rebuild=False,
+                          feature_set=DEFAULT_FEATURE_SET):
+    """
+    Process every .mat file in folder and append its windows to writer
+    (anything with append(features, labels, recording, subject)) as soon as the
+    file is done, so memory never holds more than a few recordings at once.
+    With a cache_dir only new or changed recordings are processed.
+    Returns the number of windows written.
+    """
+    failures = []
+    hits = misses = 0
+    n_windows = 0
+    subject_map = load_subjects()
 
     files = sorted([f for f in os.listdir(folder) if f.endswith(".mat")])
-    for f in files:
-        path = os.path.join(folder, f)
-        feats, labs = load_mat_file(path)
-        if feats is not None:
-            all_features.append(feats)
-            all_labels.append(labs)
-            print(f"✓ Loaded {feats.shape[0]} windows from {f}")
-
-    if not all_features:
+    paths = [os.path.join(folder, f) for f in files]
+    if cache_dir is not None:
+        os.makedirs(cache_dir, exist_ok=True)
+    start = time.perf_counter()
+    for path, feats, labs, seconds, error, cache_hit in iter_processed_files(
+            paths, workers, cache_dir, rebuild, feature_set):
+        f = os.path.basename(path)
+        if error is not None:
+            failures.append(f)
+            print(f"⚠ Could not extract EEG from {path}: {error} ({seconds:.2f}s)")
+            continue
+        recording = recording_name(path)
+        writer.append(feats, labs, recording, subject_map.get(recording, recording))
+        n_windows += len(labs)
+        if cache_hit:
+            hits += 1
+        else:
+            misses += 1
+        source = " [cached]" if cache_hit else ""
+        print(f"✓ Loaded {feats.shape[0]} windows from {f} ({seconds:.2f}s){source}")
+
+    if n_windows == 0:
         raise ValueError("No valid .mat data loaded.")
 
-    X = np.vstack(all_features)
-    y = np.concatenate(all_labels)
+    elapsed = time.perf_counter() - start
+    print(f"\n✅ Successfully loaded {n_windows} total windows from {len(files)} files "
+          f"in {elapsed:.2f}s ({workers} worker{'s' if workers != 1 else ''}).")
+    if cache_dir is not None:
+        pruned = prune_cache(cache_dir, paths)
+        print(f"Cache: {hits} hit(s), {misses} miss(es), {pruned} stale entr{'y' if pruned == 1 else 'ies'} removed")
+    if failures:
+        print(f"⚠ {len(failures)} file(s) failed: {', '.join(failures)}")
+    return n_windows
 
-    df = pd.DataFrame(X)
-    df['label'] = y
-    print(f"\n✅ Successfully loaded {len(df)} total windows from {len(files)} files.")
-    return df
+def load_all_mat_files(folder, workers=1, cache_dir=None, rebuild=False,
+                       feature_set=DEFAULT_FEATURE_SET):
+    """
+    Load all .mat files and combine into one DataFrame
+    (in memory; main() streams to disk with process_all_mat_files instead)
+    """
+    collector = DataFrameCollector(feature_set)
+    process_all_mat_files(folder, collector, workers, cache_dir, rebuild, feature_set)
+    return collector.to_dataframe()
+
+class LazyStoreWriter:
+    """FeatureStoreWriter that is created on the first append, once the channel count is known"""
+
+    def __init__(self, path, feature_set=DEFAULT_FEATURE_SET):
+        self.path = path
+        self.feature_set = feature_set
+        self.writer = None
+
+    def append(self, features, labels, recording, subject=None):
+        if self.writer is None:
+            n_channels = features.shape[1] // features_per_channel(self.feature_set)
+            pipeline = FeaturePipeline(self.feature_set, n_channels).to_dict()
+            self.writer = FeatureStoreWriter(self.path, pipeline.pop('feature_names'), pipeline)
+        self.writer.append(features, labels, recording, subject)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if self.writer is not None:
+            self.writer.__exit__(exc_type, exc, tb)
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Extract windowed EEG features from .mat recordings")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="worker processes for loading files (0 = one per CPU core)")
+    parser.add_argument("--format", choices=["store", "csv"], default="store",
+                        help=f"output format: binary store in {OUTPUT_STORE} or CSV in {OUTPUT_FILE}")
+    parser.add_argument("--features", default=",".join(DEFAULT_FEATURE_SET),
+                        help=f"comma-separated feature extractors: {', '.join(FEATURES)}")
+    parser.add_argument("--rebuild", action="store_true",
+                        help="ignore cached features and reprocess every file")
+    parser.add_argument("--no-cache", action="store_true",
+                        help=f"do not read or write the per-file cache in {CACHE_DIR}")
+    args = parser.parse_args()
+    try:
+        args.features = check_feature_set([n.strip() for n in args.features.split(",") if n.strip()])
+    except ValueError as e:
+        parser.error(str(e))
+    return args
 
 def main():
-    df = load_all_mat_files(DATA_FOLDER)
+    args = parse_args()
+    workers = args.workers or os.cpu_count()
+    cache_dir = None if args.no_cache else CACHE_DIR
     os.makedirs("data", exist_ok=True)
-    df.to_csv(OUTPUT_FILE, index=False)
-    print(f"✓ Processed data saved to {OUTPUT_FILE}")
+    if args.format == "csv":
+        writer, output = CSVFeatureWriter(OUTPUT_FILE, args.features), OUTPUT_FILE
+    else:
+        writer, output = LazyStoreWriter(OUTPUT_STORE, args.features), OUTPUT_STORE + "/"
+    with writer:
+        process_all_mat_files(DATA_FOLDER, writer, workers=workers, cache_dir=cache_dir,
+                              rebuild=args.rebuild, feature_set=args.features)
+    print(f"✓ Processed data saved to {output}")
 
 if __name__ == "__main__":
     main()
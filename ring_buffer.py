@@ -0,0 +1,127 @@
+"""
+Preallocated NumPy buffers for live EEG values
+- RingBuffer: fixed-capacity float64 window with O(1) append, mean and std
+- GrowableArray: append-only history stored in fixed-size chunks
+Neither allocates per sample, unlike deque -> np.mean or growing Python lists.
+"""
+
+import numpy as np
+
+class RingBuffer:
+    """
+    Fixed-capacity float64 ring buffer of scalars (width=None) or of rows of
+    `width` values. Running sums give O(1) windowed mean/std; they are
+    recomputed exactly once per `capacity` appends so rounding never drifts.
+    """
+
+    def __init__(self, capacity, width=None):
+        self.capacity = capacity
+        self.width = width
+        self.data = np.zeros((capacity,) if width is None else (capacity, width))
+        self.clear()
+
+    def clear(self):
+        self.count = 0  # total appends since clear (also the next write position)
+        zero = 0.0 if self.width is None else np.zeros(self.width)
+        # Sums are of (x - shift): keeps the variance accurate when values sit far from 0
+        self._shift = zero
+        self._sum = zero
+        self._sumsq = zero
+
+    def __len__(self):
+        return min(self.count, self.capacity)
+
+    @property
+    def full(self):
+        return self.count >= self.capacity
+
+    def append(self, value):
+        i = self.count % self.capacity
+        if self.width is None:
+            value = float(value)
+            if self.count == 0:
+                self._shift = value
+            elif self.count >= self.capacity:
+                old = float(self.data[i]) - self._shift
+                self._sum -= old
+                self._sumsq -= old * old
+            d = value - self._shift
+        else:
+            value = np.asarray(value, dtype=float)
+            if self.count == 0:
+                self._shift = value.copy()
+            elif self.count >= self.capacity:
+                old = self.data[i] - self._shift
+                self._sum = self._sum - old
+                self._sumsq = self._sumsq - old * old
+            d = value - self._shift
+        self.data[i] = value
+        self._sum = self._sum + d
+        self._sumsq = self._sumsq + d * d
+        self.count += 1
+        if self.count % self.capacity == 0:
+            self._resum()
+
+    def _resum(self):
+        values = self.data[:len(self)]
+        shift = values.mean(axis=0)
+        d = values - shift
+        if self.width is None:
+            self._shift, self._sum, self._sumsq = float(shift), float(d.sum()), float((d * d).sum())
+        else:
+            self._shift, self._sum, self._sumsq = shift, d.sum(axis=0), (d * d).sum(axis=0)
+
+    def mean(self):
+        """Mean of the buffered values (nan when empty)"""
+        n = len(self)
+        if n == 0:
+            return float('nan') if self.width is None else np.full(self.width, np.nan)
+        return self._shift + self._sum / n
+
+    def std(self):
+        """Population std of the buffered values (like np.std; nan when empty)"""
+        n = len(self)
+        if n == 0:
+            return float('nan') if self.width is None else np.full(self.width, np.nan)
+        m = self._sum / n
+        return np.sqrt(np.maximum(self._sumsq / n - m * m, 0.0))
+
+    def values(self):
+        """Copy of the buffered values, oldest first"""
+        if not self.full:
+            return self.data[:self.count].copy()
+        start = self.count % self.capacity
+        return np.concatenate([self.data[start:], self.data[:start]])
+
+class GrowableArray:
+    """
+    Append-only float64 history in fixed-size chunks: O(1) append with no
+    reallocation or copying as it grows, 8 bytes per value.
+    """
+
+    def __init__(self, chunk_size=4096):
+        self.chunk_size = chunk_size
+        self.clear()
+
+    def clear(self):
+        self.chunks = [np.empty(self.chunk_size)]
+        self.count = 0
+
+    def __len__(self):
+        return self.count
+
+    def append(self, value):
+        pos = self.count % self.chunk_size
+        if pos == 0 and self.count:
+            self.chunks.append(np.empty(self.chunk_size))
+        self.chunks[-1][pos] = value
+        self.count += 1
+
+    def to_array(self):
+        """All values as one contiguous array"""
+        if self.count == 0:
+            return np.empty(0)
+        return np.concatenate(self.chunks)[:self.count]
+
+    def mean(self):
+        return float(self.to_array().mean()) if self.count else float('nan')
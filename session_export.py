@@ -0,0 +1,192 @@
+"""
+Bulk export of session recordings (see session_recorder.py)
+- xlsx: xlsxwriter in constant_memory mode when installed, otherwise
+  openpyxl write-only mode (without lxml barely faster than the per-row
+  Workbook it replaces, so large sessions are better exported as csv)
+- csv via pandas; parquet via pandas + pyarrow or fastparquet (optional)
+- Rows are converted a chunk at a time (NumPy -> Python lists, vectorized
+  timestamp formatting) and progress(rows_done, rows_total) is called per chunk
+- export_in_background() runs an export on a worker thread and returns a Future
+"""
+
+import os
+import time
+import threading
+from concurrent.futures import Future
+from datetime import datetime, timezone
+import numpy as np
+import pandas as pd
+
+from session_recorder import read_recording
+
+try:
+    import xlsxwriter  # optional: fastest xlsx writer
+except ImportError:
+    xlsxwriter = None
+
+FORMATS = ('xlsx', 'csv', 'parquet')
+XLSX_ENGINES = ('xlsxwriter', 'openpyxl')
+EXPORT_CHUNK = 10000  # rows converted and written per step (and per progress call)
+TIMESTAMP_COLUMNS = ('timestamp',)  # float epoch seconds, exported as local time
+
+def local_datetimes(seconds):
+    """Epoch seconds -> naive local datetime64[us] (UTC offset taken at the first value)"""
+    seconds = np.asarray(seconds, dtype=np.float64)
+    if not len(seconds):
+        return seconds.astype('datetime64[us]')
+    first = datetime.fromtimestamp(seconds[0], timezone.utc).astimezone()
+    offset = first.utcoffset().total_seconds()
+    return np.round((seconds + offset) * 1e6).astype('int64').astype('datetime64[us]')
+
+def iso_timestamps(seconds):
+    """Epoch seconds -> local ISO 8601 strings, like datetime.fromtimestamp(s).isoformat()"""
+    return np.datetime_as_string(local_datetimes(seconds), unit='us')
+
+def _chunk_rows(columns, names, start, stop):
+    """
+    Rows [start, stop) as lists of Python values. Floats keep the precision
+    of their dtype (a float32 0.6 is 0.6, not 0.6000000238418579); NaN and
+    inf become None, i.e. empty cells.
+    """
+    values = []
+    for name in names:
+        column = columns[name][start:stop]
+        if name in TIMESTAMP_COLUMNS:
+            column = iso_timestamps(column)
+        elif column.dtype.kind == 'f':
+            if column.dtype.itemsize < 8:
+                column = column.astype(str).astype(np.float64)  # shortest text that round-trips
+            finite = np.isfinite(column)
+            if not finite.all():
+                column = np.where(finite, column, None)
+        values.append(column.tolist())
+    return list(zip(*values))
+
+def _write_xlsx_openpyxl(columns, names, path, title, headers, header_color, widths, progress, chunk):
+    from openpyxl import Workbook
+    from openpyxl.cell import WriteOnlyCell
+    from openpyxl.styles import Font, PatternFill, Alignment
+    from openpyxl.utils import get_column_letter
+
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet(title)
+    for i, width in enumerate(widths or []):
+        ws.column_dimensions[get_column_letter(i + 1)].width = width
+    header_cells = []
+    for header in headers:
+        cell = WriteOnlyCell(ws, value=header)
+        cell.font = Font(bold=True, color="FFFFFF")
+        if header_color:
+            cell.fill = PatternFill(start_color=header_color, end_color=header_color, fill_type="solid")
+        cell.alignment = Alignment(horizontal="center")
+        header_cells.append(cell)
+    ws.append(header_cells)
+
+    n = len(columns[names[0]])
+    for start in range(0, n, chunk):
+        for row in _chunk_rows(columns, names, start, start + chunk):
+            ws.append(row)
+        progress(min(start + chunk, n), n)
+    wb.save(path)
+
+def _write_xlsx_xlsxwriter(columns, names, path, title, headers, header_color, widths, progress, chunk):
+    wb = xlsxwriter.Workbook(path, {'constant_memory': True})
+    ws = wb.add_worksheet(title)
+    for i, width in enumerate(widths or []):
+        ws.set_column(i, i, width)
+    header_format = {'bold': True, 'font_color': '#FFFFFF', 'align': 'center'}
+    if header_color:
+        header_format.update({'bg_color': '#' + header_color, 'pattern': 1})
+    ws.write_row(0, 0, headers, wb.add_format(header_format))
+
+    n = len(columns[names[0]])
+    for start in range(0, n, chunk):
+        for r, row in enumerate(_chunk_rows(columns, names, start, start + chunk), start + 1):
+            ws.write_row(r, 0, row)
+        progress(min(start + chunk, n), n)
+    wb.close()
+
+_XLSX_WRITERS = {
+    'xlsxwriter': _write_xlsx_xlsxwriter,
+    'openpyxl': _write_xlsx_openpyxl,
+}
+
+def _write_csv(columns, names, path, headers, progress, chunk):
+    n = len(columns[names[0]])
+    with open(path, 'w', newline='', encoding='utf-8') as f:
+        pd.DataFrame(columns=headers).to_csv(f, index=False)
+        for start in range(0, n, chunk):
+            block = {h: (iso_timestamps(columns[name][start:start + chunk]) if name in TIMESTAMP_COLUMNS
+                         else columns[name][start:start + chunk])
+                     for h, name in zip(headers, names)}
+            pd.DataFrame(block).to_csv(f, index=False, header=False)
+            progress(min(start + chunk, n), n)
+
+def _write_parquet(columns, names, path, headers, progress):
+    n = len(columns[names[0]])
+    df = pd.DataFrame({h: (local_datetimes(columns[name]) if name in TIMESTAMP_COLUMNS else columns[name])
+                       for h, name in zip(headers, names)})
+    df.to_parquet(path, index=False)  # raises ImportError without pyarrow/fastparquet
+    progress(n, n)
+
+def export_table(columns, path, fmt=None, title="Sheet", headers=None, header_color=None,
+                 widths=None, progress=None, chunk=EXPORT_CHUNK, engine=None):
+    """
+    Write {name: array} columns (equal lengths) to path.
+    fmt defaults to the file extension; headers default to the column names.
+    header_color (hex RRGGBB), widths and engine (one of XLSX_ENGINES; default
+    xlsxwriter if installed, else openpyxl) only apply to xlsx.
+    """
+    fmt = fmt or os.path.splitext(path)[1].lstrip('.').lower()
+    if fmt not in FORMATS:
+        raise ValueError(f"Unknown export format '{fmt}' (available: {', '.join(FORMATS)})")
+    names = list(columns)
+    headers = list(headers or names)
+    progress = progress or (lambda done, total: None)
+    if not names:
+        raise ValueError("Nothing to export: no columns")
+
+    tmp_path = path + ".tmp"
+    if fmt == 'xlsx':
+        engine = engine or ('xlsxwriter' if xlsxwriter is not None else 'openpyxl')
+        if engine not in _XLSX_WRITERS:
+            raise ValueError(f"Unknown xlsx engine '{engine}' (available: {', '.join(XLSX_ENGINES)})")
+        if engine == 'xlsxwriter' and xlsxwriter is None:
+            raise ImportError("xlsxwriter is not installed")
+        _XLSX_WRITERS[engine](columns, names, tmp_path, title, headers, header_color, widths, progress, chunk)
+    elif fmt == 'csv':
+        _write_csv(columns, names, tmp_path, headers, progress, chunk)
+    else:
+        _write_parquet(columns, names, tmp_path, headers, progress)
+    os.replace(tmp_path, path)  # a half-written export never replaces a good one
+    return path
+
+def export_recording(recording_path, path, fmt=None, **options):
+    """Export a session_recorder recording; options as for export_table"""
+    return export_table(read_recording(recording_path), path, fmt, **options)
+
+def export_in_background(func, *args, **kwargs):
+    """Run func(*args, **kwargs) on a worker thread; returns a Future of its result"""
+    future = Future()
+
+    def run():
+        try:
+            future.set_result(func(*args, **kwargs))
+        except Exception as e:
+            future.set_exception(e)
+    threading.Thread(target=run, daemon=True).start()
+    return future
+
+def main():
+    import argparse
+    parser = argparse.ArgumentParser(description="Export a session recording")
+    parser.add_argument("recording", help="recording directory (e.g. sessions/<start>/eeg)")
+    parser.add_argument("output", help="output file (.xlsx, .csv or .parquet)")
+    args = parser.parse_args()
+    start = time.perf_counter()
+    export_recording(args.recording, args.output,
+                     progress=lambda done, total: print(f"\r{done}/{total} rows", end=''))
+    print(f"\n✓ Exported to {args.output} in {time.perf_counter() - start:.1f}s")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,216 @@
+"""
+Append-only columnar session recorder
+- One directory per recording; one raw little-endian file per column
+  (<column>.bin), so memory stays flat however long the session runs
+- Rows are buffered in preallocated NumPy chunks and written by a background
+  thread every flush_rows rows or flush_interval seconds, then fsync'ed
+- Text columns ('category') store int32 codes; each new label is appended to
+  <column>.labels (one JSON string per line) before any code that uses it
+- meta.json records the columns up front and is marked closed on close().
+  A recording left open by a crash is still readable: every column is cut to
+  the rows that were written completely (see recover()).
+"""
+
+import os
+import json
+import time
+import queue
+import threading
+import numpy as np
+
+META_FILE = "meta.json"
+RECORDER_VERSION = 1
+FLUSH_ROWS = 4096
+FLUSH_INTERVAL = 1.0  # seconds between flushes of a partly filled chunk
+
+def _write_meta(path, meta):
+    tmp_path = os.path.join(path, META_FILE + ".tmp")
+    with open(tmp_path, 'w') as f:
+        json.dump(meta, f, indent=2)
+    os.replace(tmp_path, os.path.join(path, META_FILE))
+
+def _read_meta(path):
+    with open(os.path.join(path, META_FILE)) as f:
+        meta = json.load(f)
+    if meta.get('recorder_version') != RECORDER_VERSION:
+        raise ValueError(f"Unsupported recording version: {meta.get('recorder_version')}")
+    return meta
+
+def _storage_dtype(dtype):
+    return np.dtype('<i4') if dtype == 'category' else np.dtype(dtype).newbyteorder('<')
+
+class SessionRecorder:
+    """
+    Records rows of fixed columns, e.g.
+    SessionRecorder(path, [('timestamp', 'f8'), ('attention', 'f4'), ('status', 'category')]).
+    append() is meant for one producer thread; writes happen on the recorder's own thread.
+    """
+
+    def __init__(self, path, columns, flush_rows=FLUSH_ROWS, flush_interval=FLUSH_INTERVAL):
+        self.path = path
+        self.columns = [(name, dtype if dtype == 'category' else np.dtype(dtype).str) for name, dtype in columns]
+        self.names = [name for name, _ in self.columns]
+        self.flush_rows = flush_rows
+        self.flush_interval = flush_interval
+        self.n_rows = 0  # rows appended (flushed or not)
+        os.makedirs(path, exist_ok=True)
+        if os.path.exists(os.path.join(path, META_FILE)):
+            raise FileExistsError(f"{path} already holds a recording")
+        _write_meta(path, {'recorder_version': RECORDER_VERSION, 'columns': self.columns,
+                           'created': time.time(), 'closed': False})
+
+        self._dtypes = [_storage_dtype(dtype) for _, dtype in self.columns]
+        self._labels = {name: {} for name, dtype in self.columns if dtype == 'category'}
+        self._new_labels = {name: [] for name in self._labels}
+        self._files = {name: open(os.path.join(path, name + ".bin"), 'ab') for name in self.names}
+        self._label_files = {name: open(os.path.join(path, name + ".labels"), 'a', encoding='utf-8')
+                             for name in self._labels}
+        self._chunk = self._new_chunk()
+        self._fill = 0
+        self._lock = threading.Lock()
+        self._pending = queue.SimpleQueue()
+        self._closed = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def _new_chunk(self):
+        return [np.empty(self.flush_rows, dtype=dtype) for dtype in self._dtypes]
+
+    def _code(self, name, label):
+        labels = self._labels[name]
+        code = labels.get(label)
+        if code is None:
+            code = labels[label] = len(labels)
+            self._new_labels[name].append(label)
+        return code
+
+    def append(self, *values):
+        """Append one row, values in column order (ValueError once closed)"""
+        with self._lock:
+            if self._closed.is_set():
+                raise ValueError(f"Recording {self.path} is closed")
+            i = self._fill
+            for column, name, value in zip(self._chunk, self.names, values):
+                column[i] = self._code(name, value) if name in self._labels else value
+            self._fill += 1
+            self.n_rows += 1
+            if self._fill == self.flush_rows:
+                self._hand_off()
+
+    def __len__(self):
+        return self.n_rows
+
+    def _hand_off(self):
+        """Queue the filled part of the current chunk for writing (lock held)"""
+        if not self._fill and not any(self._new_labels.values()):
+            return
+        self._pending.put(([c[:self._fill] for c in self._chunk], self._new_labels))
+        self._new_labels = {name: [] for name in self._labels}
+        self._chunk = self._new_chunk()
+        self._fill = 0
+
+    def _write(self, columns, new_labels):
+        # Labels first, so every code on disk has its label on disk
+        for name, labels in new_labels.items():
+            if labels:
+                f = self._label_files[name]
+                f.write(''.join(json.dumps(label) + '\n' for label in labels))
+                f.flush()
+                os.fsync(f.fileno())
+        for name, column in zip(self.names, columns):
+            f = self._files[name]
+            column.tofile(f)
+            f.flush()
+            os.fsync(f.fileno())
+
+    def _run(self):
+        while True:
+            try:
+                item = self._pending.get(timeout=self.flush_interval)
+            except queue.Empty:
+                with self._lock:
+                    self._hand_off()
+                continue
+            if item is None:
+                return
+            self._write(*item)
+
+    def flush(self):
+        """Queue everything appended so far for writing"""
+        with self._lock:
+            self._hand_off()
+
+    def close(self):
+        if self._closed.is_set():
+            return
+        self._closed.set()
+        self.flush()
+        self._pending.put(None)
+        self._thread.join()
+        for f in list(self._files.values()) + list(self._label_files.values()):
+            f.close()
+        meta = _read_meta(self.path)
+        meta.update({'closed': True, 'n_rows': self.n_rows})
+        _write_meta(self.path, meta)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+def _complete_rows(path, meta):
+    sizes = []
+    for name, dtype in meta['columns']:
+        file = os.path.join(path, name + ".bin")
+        size = os.path.getsize(file) if os.path.exists(file) else 0
+        sizes.append(size // _storage_dtype(dtype).itemsize)
+    return min(sizes) if sizes else 0
+
+def read_recording(path):
+    """Columns of a recording as {name: array}; category columns become object arrays of labels"""
+    meta = _read_meta(path)
+    n = meta['n_rows'] if meta.get('closed') else _complete_rows(path, meta)
+    data = {}
+    for name, dtype in meta['columns']:
+        values = np.fromfile(os.path.join(path, name + ".bin"), dtype=_storage_dtype(dtype), count=n)
+        if dtype == 'category':
+            with open(os.path.join(path, name + ".labels"), encoding='utf-8') as f:
+                labels = [json.loads(line) for line in f if line.endswith('\n')]
+            values = np.asarray(labels + [None], dtype=object)[np.minimum(values, len(labels))]
+        data[name] = values
+    return data
+
+def is_closed(path):
+    return _read_meta(path).get('closed', False)
+
+def recover(path):
+    """
+    Make a recording left open by a crash consistent: cut every column to the
+    rows written completely and mark it closed. Returns the recovered row count.
+    """
+    meta = _read_meta(path)
+    if meta.get('closed'):
+        return meta['n_rows']
+    n = _complete_rows(path, meta)
+    for name, dtype in meta['columns']:
+        file = os.path.join(path, name + ".bin")
+        if not os.path.exists(file):
+            open(file, 'wb').close()
+        with open(file, 'r+b') as f:
+            f.truncate(n * _storage_dtype(dtype).itemsize)
+    meta.update({'closed': True, 'n_rows': n, 'recovered': True})
+    _write_meta(path, meta)
+    return n
+
+def find_unclosed(root):
+    """Recordings under root (searched recursively) that were never closed"""
+    found = []
+    for dirpath, _, files in os.walk(root):
+        if META_FILE in files:
+            try:
+                if not is_closed(dirpath):
+                    found.append(dirpath)
+            except (ValueError, json.JSONDecodeError):
+                continue
+    return sorted(found)
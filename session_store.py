@@ -0,0 +1,247 @@
+"""
+SQLite store for saved reading-session results (app.py /save_session)
+- One database file (default: <SAVE_DIR>/session_results.db) in WAL mode, so
+  readers never block the writer and a crash mid-save leaves no partial row
+- All writes go through one writer thread that commits whatever saves are
+  queued in a single transaction; save() returns once its row is committed.
+  Concurrent Flask threads therefore never race on a header check or an append
+- Each result row keeps the summary columns of the old session_results.csv;
+  the full per-sample h_* histories go in a side table as little-endian
+  float32 blobs (4 bytes per sample)
+- results() / aggregate() filter by user, group and session; export_csv()
+  writes the legacy CSV layout on demand and import_csv() loads one
+"""
+
+import os
+import time
+import queue
+import sqlite3
+import threading
+from concurrent.futures import Future
+import numpy as np
+import pandas as pd
+
+DB_FILE = "session_results.db"
+SERIES_DTYPE = np.dtype('<f4')
+MAX_BATCH = 256  # saves committed per transaction at most
+
+# (CSV / API name, SQL column, SQL type) in legacy session_results.csv order
+RESULT_COLUMNS = [
+    ('User_ID', 'user_id', 'TEXT'),
+    ('Group', 'grp', 'TEXT'),
+    ('Session', 'session', 'TEXT'),
+    ('Date', 'date', 'TEXT'),
+    ('Read_Time_Sec', 'read_time_sec', 'REAL'),
+    ('Avg_Focus', 'avg_focus', 'REAL'),
+    ('Avg_Alpha', 'avg_alpha', 'REAL'),
+    ('Avg_Beta', 'avg_beta', 'REAL'),
+    ('Avg_Theta', 'avg_theta', 'REAL'),
+    ('Avg_Gamma', 'avg_gamma', 'REAL'),
+    ('Threshold', 'threshold', 'REAL'),
+    ('Interventions', 'interventions', 'INTEGER'),
+    ('Quiz_Score', 'quiz_score', 'REAL'),
+    ('Memory_Score', 'memory_score', 'REAL'),
+    ('Memory_Errors', 'memory_errors', 'REAL'),
+]
+SQL_NAMES = {name: column for name, column, _ in RESULT_COLUMNS}
+NUMERIC_COLUMNS = [name for name, _, kind in RESULT_COLUMNS if kind != 'TEXT']
+GROUP_BY = {'user': 'user_id', 'group': 'grp', 'session': 'session'}
+
+SCHEMA = f"""
+CREATE TABLE IF NOT EXISTS results (
+    id INTEGER PRIMARY KEY,
+    saved_at REAL NOT NULL,
+    device_session TEXT,
+    {', '.join(f'{column} {kind}' for _, column, kind in RESULT_COLUMNS)}
+);
+CREATE INDEX IF NOT EXISTS results_user ON results (user_id);
+CREATE INDEX IF NOT EXISTS results_group ON results (grp);
+CREATE INDEX IF NOT EXISTS results_session ON results (session);
+CREATE TABLE IF NOT EXISTS series (
+    result_id INTEGER NOT NULL REFERENCES results (id) ON DELETE CASCADE,
+    key TEXT NOT NULL,
+    n INTEGER NOT NULL,
+    data BLOB NOT NULL,
+    PRIMARY KEY (result_id, key)
+);
+"""
+
+def _connect(path):
+    conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")  # durable at each WAL checkpoint; never corrupt
+    conn.execute("PRAGMA foreign_keys=ON")
+    return conn
+
+def _where(user_id=None, group=None, session=None):
+    clauses, params = [], []
+    for column, value in (('user_id', user_id), ('grp', group), ('session', session)):
+        if value is not None:
+            clauses.append(f"{column} = ?")
+            params.append(str(value))
+    return (" WHERE " + " AND ".join(clauses) if clauses else ""), params
+
+class SessionStore:
+    """
+    Session result database. save() may be called from any thread; reads use
+    one connection per calling thread.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._writer = _connect(path)
+        self._writer.executescript(SCHEMA)
+        self._local = threading.local()
+        self._queue = queue.SimpleQueue()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def _reader(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = self._local.conn = _connect(self.path)
+        return conn
+
+    # --- writes -------------------------------------------------------------
+
+    def save(self, row, series=None, device_session=None, wait=True):
+        """
+        Store one result. row uses the RESULT_COLUMNS names (missing ones are
+        NULL, unknown ones rejected); series maps names like 'h_focus' to 1-D
+        arrays. Returns the new row id (or a Future of it when wait=False).
+        """
+        unknown = set(row) - set(SQL_NAMES)
+        if unknown:
+            raise ValueError(f"Unknown result columns: {', '.join(sorted(unknown))}")
+        blobs = {key: np.asarray(values, dtype=SERIES_DTYPE).tobytes()
+                 for key, values in (series or {}).items()}
+        future = Future()
+        self._queue.put((dict(row), blobs, device_session, future))
+        return future.result() if wait else future
+
+    def _insert(self, row, blobs, device_session):
+        columns = ['saved_at', 'device_session'] + [SQL_NAMES[name] for name in row]
+        cursor = self._writer.execute(
+            f"INSERT INTO results ({', '.join(columns)}) VALUES ({', '.join('?' * len(columns))})",
+            [time.time(), device_session, *(v.item() if isinstance(v, np.generic) else v for v in row.values())])
+        result_id = cursor.lastrowid
+        self._writer.executemany(
+            "INSERT INTO series (result_id, key, n, data) VALUES (?, ?, ?, ?)",
+            [(result_id, key, len(blob) // SERIES_DTYPE.itemsize, blob) for key, blob in blobs.items()])
+        return result_id
+
+    def _run(self):
+        while True:
+            batch = [self._queue.get()]
+            while len(batch) < MAX_BATCH:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            if any(item is None for item in batch):
+                self._commit([item for item in batch if item is not None])
+                return
+            self._commit(batch)
+
+    def _commit(self, batch):
+        """Insert a batch in one transaction; a failing row is retried alone so it fails by itself"""
+        if not batch:
+            return
+        try:
+            with self._writer:
+                ids = [self._insert(*item[:3]) for item in batch]
+        except Exception as e:
+            if len(batch) == 1:
+                batch[0][3].set_exception(e)
+                return
+            for item in batch:
+                self._commit([item])
+            return
+        for item, result_id in zip(batch, ids):
+            item[3].set_result(result_id)
+
+    def close(self):
+        self._queue.put(None)
+        self._thread.join()
+        self._writer.close()
+
+    # --- reads --------------------------------------------------------------
+
+    def results(self, user_id=None, group=None, session=None):
+        """Matching results (legacy column names plus id, saved_at, device_session), oldest first"""
+        where, params = _where(user_id, group, session)
+        columns = ', '.join(f'{column} AS "{name}"' for name, column, _ in RESULT_COLUMNS)
+        return pd.read_sql_query(
+            f"SELECT id, saved_at, device_session, {columns} FROM results{where} ORDER BY id",
+            self._reader(), params=params)
+
+    def aggregate(self, by='group', user_id=None, group=None, session=None):
+        """Count and mean of every numeric column per user, group or session"""
+        if by not in GROUP_BY:
+            raise ValueError(f"by must be one of {', '.join(GROUP_BY)}")
+        key = GROUP_BY[by]
+        where, params = _where(user_id, group, session)
+        means = ', '.join(f'AVG({SQL_NAMES[name]}) AS "{name}"' for name in NUMERIC_COLUMNS)
+        return pd.read_sql_query(
+            f'SELECT {key} AS "{by}", COUNT(*) AS n, {means} FROM results{where} '
+            f'GROUP BY {key} ORDER BY {key}', self._reader(), params=params)
+
+    def series(self, result_id, keys=None):
+        """{key: float32 array} of the histories saved with a result"""
+        rows = self._reader().execute(
+            "SELECT key, data FROM series WHERE result_id = ?", (result_id,)).fetchall()
+        return {key: np.frombuffer(data, dtype=SERIES_DTYPE)
+                for key, data in rows if keys is None or key in keys}
+
+    def export_csv(self, path_or_buffer, **filters):
+        """Write matching results in the legacy session_results.csv layout"""
+        df = self.results(**filters)[[name for name, _, _ in RESULT_COLUMNS]]
+        df.to_csv(path_or_buffer, index=False)
+        return len(df)
+
+    def import_csv(self, path):
+        """Load rows from a legacy session_results.csv (no series); returns the count"""
+        df = pd.read_csv(path)
+        df = df[[name for name in df.columns if name in SQL_NAMES]]
+        futures = [self.save({k: v for k, v in row.items() if pd.notna(v)}, wait=False)
+                   for row in df.to_dict('records')]
+        for future in futures:
+            future.result()
+        return len(futures)
+
+def main():
+    import sys
+    import argparse
+    parser = argparse.ArgumentParser(description="Query or export saved session results")
+    parser.add_argument("db", help=f"database file (e.g. <SAVE_DIR>/{DB_FILE})")
+    sub = parser.add_subparsers(dest="command", required=True)
+    for name in ("list", "summary", "export"):
+        p = sub.add_parser(name)
+        p.add_argument("--user")
+        p.add_argument("--group")
+        p.add_argument("--session")
+        if name == "summary":
+            p.add_argument("--by", choices=list(GROUP_BY), default="group")
+        if name == "export":
+            p.add_argument("output", nargs="?", help="CSV file (default: stdout)")
+    sub.add_parser("import").add_argument("csv", help="legacy session_results.csv")
+    args = parser.parse_args()
+
+    store = SessionStore(args.db)
+    if args.command == "import":
+        print(f"✓ Imported {store.import_csv(args.csv)} results")
+    else:
+        filters = dict(user_id=args.user, group=args.group, session=args.session)
+        if args.command == "list":
+            print(store.results(**filters).to_string(index=False))
+        elif args.command == "summary":
+            print(store.aggregate(args.by, **filters).to_string(index=False))
+        else:
+            n = store.export_csv(args.output or sys.stdout, **filters)
+            if args.output:
+                print(f"✓ Exported {n} results to {args.output}")
+    store.close()
+
+if __name__ == "__main__":
+    main()
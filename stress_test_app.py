@@ -0,0 +1,139 @@
+"""
+Stress test: app.py ingestion under concurrent OSC and HTTP load
+- Starts the OSC receiver, ingest thread, status clock and Flask (threaded)
+  in-process on free local ports
+- Sender threads stream band packets for N_SESSIONS sessions (16, the
+  number of headsets one process must serve) at RATE_HZ each
+  (25x the Muse band rate by default) while HTTP threads hammer status, snapshot and
+  start_reading
+- Checks every sent value was ingested and every snapshot was consistent
+  (h_alpha and h_focus are appended together, so their lengths must match).
+  Datagrams the kernel drops before app.py sees them (UDP RcvbufErrors,
+  Linux only) are reported separately: that is socket overflow, not the app.
+"""
+
+import sys
+import time
+import socket
+import threading
+import urllib.request
+import json
+import logging
+import argparse
+from werkzeug.serving import make_server
+from pythonosc.udp_client import SimpleUDPClient
+
+import app
+
+N_SESSIONS = 16
+PACKETS_PER_SESSION = 10000  # per band
+RATE_HZ = 250  # values per band per second for each session
+N_HTTP_CLIENTS = 4
+
+def free_port(kind=socket.SOCK_STREAM):
+    with socket.socket(socket.AF_INET, kind) as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+def udp_rcvbuf_errors():
+    try:
+        with open("/proc/net/snmp") as f:
+            rows = [line.split() for line in f if line.startswith("Udp:")]
+        return int(dict(zip(rows[0], rows[1]))['RcvbufErrors'])
+    except (OSError, KeyError, IndexError):
+        return None
+
+def send_osc(port, session_id, n, rate=RATE_HZ):
+    client = SimpleUDPClient("127.0.0.1", port)
+    start = time.perf_counter()
+    for i in range(n):
+        for band in app.BANDS:
+            client.send_message(f"/{session_id}/muse/elements/{band}_absolute", [1.0 + i % 7, 2.0])
+        delay = start + (i + 1) / rate - time.perf_counter()
+        if delay > 0: time.sleep(delay)
+
+def http(base, path, body=None):
+    data = None if body is None else json.dumps(body).encode()
+    req = urllib.request.Request(base + path, data=data, headers={'Content-Type': 'application/json'})
+    with urllib.request.urlopen(req) as r:
+        return json.loads(r.read())
+
+def hammer_http(base, stop, errors, counts, n_sessions=N_SESSIONS):
+    n = 0
+    while not stop.is_set():
+        session_id = f"dev{n % n_sessions}"
+        try:
+            http(base, f"/sessions/{session_id}/get_status")
+            if n % 10 == 0:
+                http(base, f"/sessions/{session_id}/start_reading", {'group': 'test'})
+            for sid, snap in http(base, "/sessions").items():
+                history = snap['history']
+                if history['h_alpha'] != history['h_focus']:
+                    errors.append(f"torn snapshot for {sid}: {history}")
+        except Exception as e:
+            errors.append(repr(e))
+        n += 1
+    counts.append(n)
+
+def main():
+    parser = argparse.ArgumentParser(description="Stress test app.py ingestion")
+    parser.add_argument("--rate", type=float, default=RATE_HZ, help="values per band per second per session")
+    parser.add_argument("--sessions", type=int, default=N_SESSIONS, help="concurrent OSC streams")
+    parser.add_argument("--http-clients", type=int, default=N_HTTP_CLIENTS)
+    parser.add_argument("--packets", type=int, default=PACKETS_PER_SESSION, help="values per band per session")
+    args = parser.parse_args()
+    logging.getLogger('werkzeug').setLevel(logging.ERROR)
+    osc_port, web_port = free_port(socket.SOCK_DGRAM), free_port()
+    app.sessions.configured.update(f"dev{i}" for i in range(args.sessions))  # as app.py --session
+    app.start_osc([(osc_port, app.DEFAULT_SESSION)], "127.0.0.1")
+    threading.Thread(target=app.run_status_clock, args=(0.05,), daemon=True).start()
+    server = make_server("127.0.0.1", web_port, app.app, threaded=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base = f"http://127.0.0.1:{web_port}"
+    time.sleep(0.2)
+
+    stop, errors, counts = threading.Event(), [], []
+    hammers = [threading.Thread(target=hammer_http, args=(base, stop, errors, counts, args.sessions))
+               for _ in range(args.http_clients)]
+    senders = [threading.Thread(target=send_osc, args=(osc_port, f"dev{i}", args.packets, args.rate))
+               for i in range(args.sessions)]
+    drops_before = udp_rcvbuf_errors()
+    start = time.perf_counter()
+    for t in hammers + senders: t.start()
+    for t in senders: t.join()
+    sent_time = time.perf_counter() - start
+
+    # Let the ingest queue drain, then stop the HTTP load
+    expected = {band: args.packets for band in app.BANDS}
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        snaps = http(base, "/sessions")
+        if all(snaps.get(f"dev{i}", {}).get('samples') == expected for i in range(args.sessions)):
+            break
+        time.sleep(0.1)
+    stop.set()
+    for t in hammers: t.join()
+    server.shutdown()
+    drops = None if drops_before is None else udp_rcvbuf_errors() - drops_before
+
+    total = args.sessions * args.packets * len(app.BANDS)
+    print(f"OSC:  {total} packets in {sent_time:.2f}s ({total / sent_time:,.0f}/s) "
+          f"across {args.sessions} sessions")
+    print(f"HTTP: {sum(counts)} request rounds from {args.http_clients} clients")
+    if drops is not None: print(f"UDP:  {drops} datagrams dropped by the kernel (socket buffer full)")
+    lost = {sid: {b: args.packets - n for b, n in snap['samples'].items() if n != args.packets}
+            for sid, snap in snaps.items()}
+    lost = {sid: bands for sid, bands in lost.items() if bands}
+    n_lost = sum(sum(bands.values()) for bands in lost.values())
+    if n_lost and drops and n_lost <= drops:
+        # Every missing value is accounted for by socket overflow: the machine, not app.py
+        print(f"⚠ {n_lost} values never reached app.py; lower --rate or --http-clients")
+    elif lost:
+        errors.append(f"lost samples: {lost}")
+    for e in errors[:10]: print(f"✗ {e}")
+    if errors:
+        sys.exit(1)
+    print("✓ No samples lost by app.py, no torn snapshots")
+
+if __name__ == "__main__":
+    main()
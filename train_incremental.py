@@ -0,0 +1,240 @@
+"""
+Out-of-core training for feature tables larger than RAM
+- Streams chunks of CHUNK_ROWS windows from the feature store (plain file
+  reads, see FeatureStore.iter_chunks) or a CSV (pandas chunksize), as float32
+- Pass 1 fits the StandardScaler with partial_fit; each epoch then feeds the
+  scaled, shuffled chunk to every incremental learner in mini-batches of
+  BATCH_ROWS with partial_fit; a last pass scores the held-out windows
+- The test set is whole groups (recordings or subjects, as train_ml_model.py
+  --group-by) chosen by a hash of the group name, so it is fixed without
+  holding any id list in memory
+- Peak memory is a few chunks whatever the dataset size; the report gives
+  windows/second for every pass and the process's peak RSS
+The most accurate learner with predict_proba (needed by eeg_predict.py) is
+saved with save_model() like train_ml_model.py.
+"""
+
+import time
+import zlib
+import argparse
+import numpy as np
+import pandas as pd
+from sklearn.preprocessing import StandardScaler
+from sklearn.linear_model import SGDClassifier, Perceptron
+
+from feature_store import FeatureStore, is_feature_store
+from train_ml_model import (EEGModelTrainer, resolve_data_path, data_pipeline, peak_rss_mb,
+                            FEATURE_STORE, FEATURE_CSV, ID_COLUMNS, TEST_SIZE, GROUP_BY)
+
+CHUNK_ROWS = 200_000  # windows read per chunk (memory is a small multiple of this)
+BATCH_ROWS = 10_000  # windows per partial_fit call
+EPOCHS = 3
+CLASSES = np.array([0, 1])
+
+def incremental_models():
+    """Unfitted learners with partial_fit"""
+    return {
+        'SGD Logistic': SGDClassifier(loss='log_loss', alpha=1e-4, random_state=42),
+        'SGD Modified Huber': SGDClassifier(loss='modified_huber', alpha=1e-4, random_state=42),
+        'Perceptron': Perceptron(alpha=1e-5, penalty='l2', random_state=42),
+        'SGD Hinge': SGDClassifier(loss='hinge', alpha=1e-4, random_state=42),
+    }
+
+def is_test_group(name, test_size=TEST_SIZE):
+    """Stable holdout membership of a group name (same answer on every pass and run)"""
+    return zlib.crc32(str(name).encode()) % 1000 < test_size * 1000
+
+class ChunkSource:
+    """
+    Re-iterable chunks of (features float32, labels int8, is_test bool) from a
+    feature store or CSV. Without groups, windows go to the test set in
+    blocks of 1000 rows (still hashed, so adjacent overlapping windows mostly
+    stay together).
+    """
+
+    def __init__(self, path, chunk_rows=CHUNK_ROWS, group_by=GROUP_BY):
+        self.path = path
+        self.chunk_rows = chunk_rows
+        self.group_by = group_by
+        if is_feature_store(path):
+            self.store = FeatureStore(path)
+            self.feature_names = self.store.feature_names
+            self.n_rows = len(self.store)
+            names = {'recording': self.store.recording_names, 'subject': self.store.subject_names}
+            # Holdout flag per group code, looked up per chunk
+            self._test_codes = (np.array([is_test_group(n) for n in names[group_by]]) if group_by else None)
+        else:
+            self.store = None
+            header = pd.read_csv(path, nrows=0).columns
+            self.feature_names = [c for c in header if c not in ID_COLUMNS]
+            self.n_rows = None  # unknown until the first pass
+            self._group_column = (group_by if group_by in header else 'recording') if group_by else None
+            if self._group_column not in header:
+                self._group_column = None
+        self.pipeline = data_pipeline(self.feature_names, self.store)
+
+    @property
+    def grouped(self):
+        return (self._test_codes if self.store is not None else self._group_column) is not None
+
+    def ungroup(self):
+        """Hold out row blocks instead of whole groups from now on"""
+        self._test_codes = self._group_column = None
+
+    def _row_blocks_test(self, start, n):
+        blocks, inverse = np.unique((start + np.arange(n)) // 1000, return_inverse=True)
+        return np.array([is_test_group(b) for b in blocks])[inverse]
+
+    def __iter__(self):
+        start = 0
+        if self.store is not None:
+            for chunk in self.store.iter_chunks(self.chunk_rows):
+                n = len(chunk['labels'])
+                if self._test_codes is not None:
+                    is_test = self._test_codes[chunk[self.group_by]]
+                else:
+                    is_test = self._row_blocks_test(start, n)
+                yield chunk['features'], chunk['labels'], is_test
+                start += n
+            return
+        dtype = {c: np.float32 for c in self.feature_names}
+        dtype['label'] = np.int8
+        for data in pd.read_csv(self.path, dtype=dtype, chunksize=self.chunk_rows):
+            n = len(data)
+            if self._group_column is not None:
+                groups = data[self._group_column].astype(str)
+                flags = {g: is_test_group(g) for g in groups.unique()}
+                is_test = groups.map(flags).to_numpy(bool)
+            else:
+                is_test = self._row_blocks_test(start, n)
+            yield data[self.feature_names].to_numpy(np.float32), data['label'].to_numpy(np.int8), is_test
+            start += n
+        self.n_rows = start
+
+def report(what, n, seconds):
+    peak = peak_rss_mb()
+    print(f"{what:<24}{n:>12,} windows {seconds:>8.1f}s {n / seconds if seconds else 0:>12,.0f} windows/s"
+          f"   peak RSS {'n/a' if peak is None else f'{peak:,.0f} MB'}")
+
+def fit_scaler(source):
+    """Pass 1: scaler.partial_fit over the training windows; returns (scaler, train count, test count)"""
+    scaler = StandardScaler()
+    n_train = n_test = 0
+    start = time.perf_counter()
+    for X, y, is_test in source:
+        if (~is_test).any():
+            scaler.partial_fit(X[~is_test])
+        n_train += int((~is_test).sum())
+        n_test += int(is_test.sum())
+    report("Scaler pass", n_train + n_test, time.perf_counter() - start)
+    if not n_train:
+        raise ValueError(f"No training windows: all {n_test:,} windows fell in held-out groups")
+    return scaler, n_train, n_test
+
+def train_epoch(source, scaler, models, batch_rows=BATCH_ROWS, seed=0):
+    """One pass: every model partial_fits each shuffled mini-batch of training windows"""
+    rng = np.random.default_rng(seed)
+    n = 0
+    fit_sec = dict.fromkeys(models, 0.0)
+    for X, y, is_test in source:
+        if is_test.all():
+            continue  # whole chunk held out (recordings are stored contiguously)
+        X, y = scaler.transform(X[~is_test]), y[~is_test]
+        order = rng.permutation(len(y))
+        for i in range(0, len(order), batch_rows):
+            batch = order[i:i + batch_rows]
+            for name, model in models.items():
+                t = time.perf_counter()
+                model.partial_fit(X[batch], y[batch], classes=CLASSES)
+                fit_sec[name] += time.perf_counter() - t
+        n += len(y)
+    return n, fit_sec
+
+def evaluate(source, scaler, models):
+    """Held-out accuracy of every model, accumulated chunk by chunk"""
+    correct = dict.fromkeys(models, 0)
+    n = 0
+    for X, y, is_test in source:
+        if not is_test.any():
+            continue
+        X, y = scaler.transform(X[is_test]), y[is_test]
+        for name, model in models.items():
+            correct[name] += int((model.predict(X) == y).sum())
+        n += len(y)
+    return {name: c / n if n else float('nan') for name, c in correct.items()}, n
+
+def main():
+    parser = argparse.ArgumentParser(description="Out-of-core incremental training")
+    parser.add_argument("data", nargs="?", help=f"feature store or CSV (default: {FEATURE_STORE} "
+                                                f"if present, else {FEATURE_CSV})")
+    parser.add_argument("--chunk-rows", type=int, default=CHUNK_ROWS)
+    parser.add_argument("--batch-rows", type=int, default=BATCH_ROWS)
+    parser.add_argument("--epochs", type=int, default=EPOCHS)
+    parser.add_argument("--models", nargs="+", default=list(incremental_models()),
+                        choices=list(incremental_models()))
+    parser.add_argument("--group-by", default=GROUP_BY, choices=['subject', 'recording', 'none'])
+    parser.add_argument("--no-save", action="store_true")
+    args = parser.parse_args()
+
+    path = resolve_data_path(args.data)
+    if path is None:
+        return
+
+    print("="*60)
+    print("OUT-OF-CORE TRAINING")
+    print("="*60)
+    group_by = None if args.group_by == 'none' else args.group_by
+    source = ChunkSource(path, args.chunk_rows, group_by)
+    print(f"Streaming {path}: {len(source.feature_names)} features, chunks of {args.chunk_rows:,} windows, "
+          f"mini-batches of {args.batch_rows:,}; holdout by {group_by or 'row block'}")
+
+    total = time.perf_counter()
+    try:
+        scaler, n_train, n_test = fit_scaler(source)
+        if not n_test and source.grouped:
+            # Few groups: the name hash can put none of them in the test set
+            print(f"⚠ No {group_by} group fell in the test set; holding out row blocks instead "
+                  f"(overlapping windows make test accuracy optimistic)")
+            source.ungroup()
+            scaler, n_train, n_test = fit_scaler(source)
+    except ValueError as e:
+        print(f"ERROR: {e}")
+        return
+    print(f"  {n_train:,} training / {n_test:,} test windows")
+    models = {name: model for name, model in incremental_models().items() if name in args.models}
+    fit_sec = dict.fromkeys(models, 0.0)
+    for epoch in range(args.epochs):
+        start = time.perf_counter()
+        n, epoch_fit = train_epoch(source, scaler, models, args.batch_rows, seed=epoch)
+        for name, seconds in epoch_fit.items():
+            fit_sec[name] += seconds
+        report(f"Epoch {epoch + 1}/{args.epochs}", n, time.perf_counter() - start)
+    start = time.perf_counter()
+    accuracy, n = evaluate(source, scaler, models)
+    report("Evaluation pass", n, time.perf_counter() - start)
+    elapsed = time.perf_counter() - total
+    print(f"\nTotal {elapsed:.1f}s for {args.epochs} epoch(s): "
+          f"{n_train * args.epochs / elapsed:,.0f} training windows/s end to end\n")
+    print(f"{'Model':<22}{'test acc':>10}{'fit s':>9}{'fit windows/s':>15}")
+    for name in models:
+        print(f"{name:<22}{accuracy[name]:>10.3f}{fit_sec[name]:>9.1f}"
+              f"{n_train * args.epochs / fit_sec[name] if fit_sec[name] else 0:>15,.0f}")
+
+    if not n:
+        print("⚠ No held-out windows to score; nothing saved")
+        return
+    if args.no_save:
+        return
+    # eeg_predict needs predict_proba (log_loss / modified_huber); hinge and Perceptron lack it
+    probabilistic = [name for name, model in models.items() if hasattr(model, 'predict_proba')]
+    if not probabilistic:
+        print("⚠ None of the trained learners has predict_proba; nothing saved "
+              "(include 'SGD Logistic' or 'SGD Modified Huber')")
+        return
+    best = max(probabilistic, key=accuracy.get)
+    trainer = EEGModelTrainer(group_by)
+    trainer.scaler, trainer.feature_names, trainer.pipeline = scaler, source.feature_names, source.pipeline
+    trainer.save_model(best, models[best])
+
+if __name__ == "__main__":
+    main()
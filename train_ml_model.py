@@ -1,101 +1,357 @@
 import pandas as pd
 import numpy as np
-from sklearn.model_selection import train_test_split, cross_val_score
+from sklearn.base import clone
+from sklearn.model_selection import (train_test_split, StratifiedKFold, StratifiedGroupKFold,
+                                     GroupShuffleSplit)
 from sklearn.preprocessing import StandardScaler
 from sklearn.linear_model import LogisticRegression
-from sklearn.ensemble import RandomForestClassifier, GradientBoostingClassifier
+from sklearn.ensemble import RandomForestClassifier, GradientBoostingClassifier, HistGradientBoostingClassifier
 from sklearn.metrics import accuracy_score, classification_report, confusion_matrix
 import joblib
+from joblib import Parallel, delayed
 import matplotlib.pyplot as plt
 import seaborn as sns
 import os
+import sys
+import time
+import argparse
+
+from feature_store import FeatureStore, is_feature_store
+from eeg_features import FeaturePipeline
+
+try:
+    import resource  # Unix only; peak memory is reported as n/a elsewhere
+except ImportError:
+    resource = None
+
+FEATURE_STORE = 'data/processed_features'
+FEATURE_CSV = 'data/processed_features.csv'
+ID_COLUMNS = ['label', 'recording', 'subject']
+N_JOBS = -1  # worker processes for training and cross-validation (-1: one per core)
+CV_FOLDS = 5
+TEST_SIZE = 0.2
+GROUP_BY = 'subject'  # 'subject', 'recording' or None: windows of one group never straddle train/test
+BACKEND = 'loky'  # joblib backend; 'threading' avoids copying data but CPU times then cover the whole process
+
+MODELS = ['Logistic Regression', 'Random Forest', 'Gradient Boosting']
+# --fast: histogram gradient boosting (binned, OpenMP-parallel) instead of exact GradientBoosting
+FAST_MODELS = ['Logistic Regression', 'Random Forest', 'Hist Gradient Boosting']
+
+def make_model(name, n_threads=-1):
+    """Unfitted model by name; n_threads goes to models with their own thread pool"""
+    if name == 'Logistic Regression':
+        return LogisticRegression(random_state=42, max_iter=1000)
+    if name == 'Random Forest':
+        return RandomForestClassifier(n_estimators=100, max_depth=10, random_state=42, n_jobs=n_threads)
+    if name == 'Gradient Boosting':
+        return GradientBoostingClassifier(n_estimators=100, max_depth=5, random_state=42)
+    if name == 'Hist Gradient Boosting':
+        # OpenMP threads; joblib's loky workers cap them at their share of the cores
+        return HistGradientBoostingClassifier(max_iter=100, max_depth=5, random_state=42)
+    raise ValueError(f"Unknown model: {name}")
+
+def candidate_models(n_threads=-1, fast=False):
+    """Unfitted candidate models"""
+    return {name: make_model(name, n_threads) for name in (FAST_MODELS if fast else MODELS)}
+
+def _timed_fit(model, X, y):
+    """Fit in a worker; returns (model, wall seconds, CPU seconds of the worker process)"""
+    wall, cpu = time.perf_counter(), time.process_time()
+    model.fit(X, y)
+    return model, time.perf_counter() - wall, time.process_time() - cpu
+
+def _fold_score(model, X, y, train, test, scaler):
+    model, wall, cpu = _timed_fit(model, scaler.transform(X[train]), y[train])
+    return accuracy_score(y[test], model.predict(scaler.transform(X[test]))), wall, cpu
+
+def cv_splits(y, groups=None, folds=CV_FOLDS, random_state=42):
+    """
+    (train, test) index pairs. With groups, no group is split between train
+    and test (StratifiedGroupKFold, at most one fold per group); without,
+    plain stratified k-fold.
+    """
+    X = np.zeros(len(y))
+    if groups is None:
+        return list(StratifiedKFold(n_splits=folds, shuffle=True, random_state=random_state).split(X, y))
+    n_groups = len(np.unique(groups))
+    if n_groups < 2:
+        raise ValueError("Grouped cross-validation needs at least 2 groups")
+    return list(StratifiedGroupKFold(n_splits=min(folds, n_groups), shuffle=True,
+                                     random_state=random_state).split(X, y, groups))
+
+class GroupedCV:
+    """
+    Leakage-free k-fold evaluation of unscaled features: folds follow
+    cv_splits() and each fold's StandardScaler is fit on its training rows
+    only. Splits and scalers are computed once and reused for every model
+    evaluated; (model, fold) fits run in parallel with joblib.
+    """
+    
+    def __init__(self, X, y, groups=None, folds=CV_FOLDS, random_state=42):
+        self.X = X if isinstance(X, np.ndarray) else np.asarray(X)
+        self.y = np.asarray(y)
+        self.groups = None if groups is None else np.asarray(groups)
+        self.splits = cv_splits(self.y, self.groups, folds, random_state)
+        self._scalers = [None] * len(self.splits)
+    
+    def scaler(self, fold):
+        if self._scalers[fold] is None:
+            self._scalers[fold] = StandardScaler().fit(self.X[self.splits[fold][0]])
+        return self._scalers[fold]
+    
+    def train_rows(self, fold, budget=1.0):
+        """
+        Training rows of a fold, subsampled to a fraction `budget` of them.
+        Subsamples are nested: a smaller budget uses a subset of a larger one.
+        """
+        train = self.splits[fold][0]
+        if budget >= 1:
+            return train
+        n = max(1, round(len(train) * budget))
+        return np.sort(np.random.default_rng(fold).permutation(train)[:n])
+    
+    def evaluate(self, models, n_jobs=N_JOBS, backend=BACKEND, budget=1.0):
+        """
+        {name: (fold accuracies, fold fit seconds, fold CPU seconds)} for
+        {name: unfitted model}, fitting on a `budget` fraction of each fold's
+        training rows (test rows and scalers are always the full fold's)
+        """
+        scalers = [self.scaler(i) for i in range(len(self.splits))]
+        tasks = [(name, i) for name in models for i in range(len(self.splits))]
+        workers, _ = plan_workers(n_jobs, len(tasks))
+        scores = Parallel(n_jobs=workers, backend=backend)(
+            delayed(_fold_score)(clone(models[name]), self.X, self.y, self.train_rows(i, budget),
+                                 self.splits[i][1], scalers[i])
+            for name, i in tasks)
+        k = len(self.splits)
+        return {name: tuple(np.array(v) for v in zip(*scores[j * k:(j + 1) * k]))
+                for j, name in enumerate(models)}
+
+def plan_workers(n_jobs, n_tasks):
+    """Concurrent workers and the threads each may use without oversubscribing the cores"""
+    cores = joblib.cpu_count()
+    workers = max(1, min(n_tasks, cores if n_jobs < 0 else n_jobs))
+    return workers, max(1, cores // workers)
+
+def peak_rss_mb():
+    """Peak resident memory of this process in MB (None without the resource module)"""
+    if resource is None:
+        return None
+    kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return kb / 1024 if sys.platform != 'darwin' else kb / 1024 ** 2
+
+def _print_timing(rows, wall, workers):
+    """rows: (name, fit seconds, CPU seconds); CPU utilization is CPU time / (wall time x cores)"""
+    cores = joblib.cpu_count()
+    print(f"\n{'Model':<22}{'fit s':>9}{'CPU s':>9}{'cores busy':>12}")
+    for name, fit_sec, cpu_sec in rows:
+        print(f"{name:<22}{fit_sec:>9.2f}{cpu_sec:>9.2f}{cpu_sec / fit_sec if fit_sec else 0:>12.1f}")
+    cpu = sum(row[2] for row in rows)
+    print(f"Wall {wall:.2f}s with {workers} worker(s); CPU {cpu:.2f}s = "
+          f"{cpu / (wall * cores):.0%} of {cores} core(s)")
+
+def resolve_data_path(file_path=None):
+    """
+    file_path, or by default the feature store when present, else the CSV.
+    None (after saying so) when it doesn't exist.
+    """
+    if file_path is None:
+        file_path = FEATURE_STORE if is_feature_store(FEATURE_STORE) else FEATURE_CSV
+    if not os.path.exists(file_path):
+        print(f"ERROR: File not found: {file_path}")
+        print("\nPlease run preprocess_data.py first!")
+        return None
+    return file_path
+
+def data_pipeline(feature_columns, store=None):
+    """
+    Feature pipeline of the training data: recorded in a feature store's
+    metadata, inferred from the column names of a CSV (None, with a warning,
+    when they match no registered feature set)
+    """
+    if store is not None:
+        return FeaturePipeline.from_dict(store.meta)
+    try:
+        return FeaturePipeline.from_feature_names(feature_columns)
+    except ValueError:
+        print("⚠ Feature columns don't match a registered feature set; "
+              "saved models won't be usable by eeg_predict.py")
+        return None
 
 class EEGModelTrainer:
     """Handles complete ML training pipeline"""
     
-    def __init__(self):
+    def __init__(self, group_by=GROUP_BY, fast=False):
         self.models = {}
         self.scaler = None
         self.feature_names = None
+        self.group_by = group_by
+        self.groups = None  # per-window group ids (see group_by); None for an ungrouped split
+        self.train_groups = None
+        self.fast = fast  # FAST_MODELS and float32 features throughout (CSV is read as float32)
+        self.pipeline = None
         self.results = {}
         
-    def load_data(self, file_path='data/processed_features.csv'):
-        """Load processed features from CSV"""
+    def load_data(self, file_path=None):
+        """
+        Load processed features from the binary feature store (memory-mapped)
+        or a CSV. By default the store is used when present.
+        """
         
         print("="*60)
         print("STEP 1: LOADING DATA")
         print("="*60)
         
-        if not os.path.exists(file_path):
-            print(f"ERROR: File not found: {file_path}")
-            print("\nPlease run preprocess_data.py first!")
+        file_path = resolve_data_path(file_path)
+        if file_path is None:
             return None, None, None
         
         print(f"Loading from: {file_path}")
-        data = pd.read_csv(file_path)
+        if is_feature_store(file_path):
+            store = FeatureStore(file_path)
+            X, y = store.features, np.asarray(store.labels)
+            feature_columns = store.feature_names
+            ids = {'recording': store.recordings, 'subject': store.subjects}
+            self.groups = np.asarray(ids[self.group_by]) if self.group_by else None
+            self.pipeline = data_pipeline(feature_columns, store)
+            n_samples = len(store)
+        else:
+            # float32 halves the memory of every copy; the feature store is float32 already
+            header = pd.read_csv(file_path, nrows=0).columns
+            dtype = {c: np.float32 for c in header if c not in ID_COLUMNS} if self.fast else None
+            data = pd.read_csv(file_path, dtype=dtype)
 
-        if 'label' not in data.columns:
-            print("⚠ No labels found. Creating dummy labels for demo.")
-            np.random.seed(42)
-            data['label'] = np.random.randint(0, 2, size=len(data))
-        
-        feature_columns = [col for col in data.columns if col != 'label']
-        X = data[feature_columns]
-        y = data['label']
+            if 'label' not in data.columns:
+                print("⚠ No labels found. Creating dummy labels for demo.")
+                np.random.seed(42)
+                data['label'] = np.random.randint(0, 2, size=len(data))
+            
+            feature_columns = [col for col in data.columns if col not in ID_COLUMNS]
+            X = data[feature_columns]
+            y = data['label'].to_numpy(np.int8) if self.fast else data['label']
+            if self.group_by:
+                column = self.group_by if self.group_by in data.columns else 'recording'
+                self.groups = data[column].to_numpy() if column in data.columns else None
+            n_samples = len(data)
+            self.pipeline = data_pipeline(feature_columns)
         self.feature_names = feature_columns
         
-        print(f"✓ Loaded {len(data)} samples with {len(feature_columns)} features")
+        print(f"✓ Loaded {n_samples} samples with {len(feature_columns)} features "
+              f"({np.asarray(X[:1]).dtype})")
+        if self.groups is not None:
+            print(f"  {len(np.unique(self.groups))} {self.group_by} groups")
         print("\nLabel distribution:")
-        print(f"  Class 0: {sum(y==0)}")
-        print(f"  Class 1: {sum(y==1)}")
+        print(f"  Class 0: {np.sum(y==0)}")
+        print(f"  Class 1: {np.sum(y==1)}")
         
         return X, y, feature_columns
     
-    def split_and_normalize(self, X, y):
-        """Split data and normalize features"""
+    def split(self, X, y):
+        """
+        Hold out a test set. With groups, whole groups go to one side so
+        overlapping windows of a recording never appear in both; the training
+        groups are kept in self.train_groups for cross-validation.
+        """
         
         print("\n" + "="*60)
         print("STEP 2: SPLITTING AND NORMALIZING DATA")
         print("="*60)
         
-        X_train, X_test, y_train, y_test = train_test_split(
-            X, y, test_size=0.2, random_state=42, stratify=y
-        )
+        y = np.asarray(y)
+        n_groups = 0 if self.groups is None else len(np.unique(self.groups))
+        if n_groups >= round(1 / TEST_SIZE):
+            # One stratified group fold of about TEST_SIZE
+            splitter = StratifiedGroupKFold(n_splits=round(1 / TEST_SIZE), shuffle=True, random_state=42)
+            train, test = next(splitter.split(np.zeros(len(y)), y, self.groups))
+        elif n_groups >= 2:
+            splitter = GroupShuffleSplit(n_splits=1, test_size=TEST_SIZE, random_state=42)
+            train, test = next(splitter.split(np.zeros(len(y)), y, self.groups))
+        else:
+            if self.group_by:
+                print(f"⚠ Fewer than 2 {self.group_by} groups: random window split "
+                      f"(overlapping windows make test accuracy optimistic)")
+            train, test = train_test_split(np.arange(len(y)), test_size=TEST_SIZE, random_state=42, stratify=y)
+        self.train_groups = self.groups[train] if n_groups >= 2 else None
+        if self.train_groups is not None and len(np.unique(self.train_groups)) < 2:
+            # e.g. 2 recordings: one is held out, so the training side can't be split by group
+            print(f"⚠ Only 1 {self.group_by} group left for training: cross-validation will be "
+                  f"ungrouped (overlapping windows make CV accuracy optimistic)")
+            self.train_groups = None
         
-        print(f"Training set: {len(X_train)} samples")
-        print(f"Testing set:  {len(X_test)} samples")
+        take = (lambda rows: X.iloc[rows]) if isinstance(X, pd.DataFrame) else (lambda rows: X[rows])
+        X_train, X_test, y_train, y_test = take(train), take(test), y[train], y[test]
         
+        print(f"Training set: {len(X_train)} samples" +
+              (f" ({len(np.unique(self.groups[train]))} groups)" if n_groups >= 2 else ""))
+        print(f"Testing set:  {len(X_test)} samples" +
+              (f" ({len(np.unique(self.groups[test]))} groups)" if n_groups >= 2 else ""))
+        return X_train, X_test, y_train, y_test
+    
+    def normalize(self, X_train, X_test):
+        """Fit the scaler on the training set and scale both sets"""
         print("\nNormalizing features...")
         self.scaler = StandardScaler()
         X_train_scaled = self.scaler.fit_transform(X_train)
         X_test_scaled = self.scaler.transform(X_test)
         print("✓ Features normalized")
-        
+        return X_train_scaled, X_test_scaled
+    
+    def split_and_normalize(self, X, y):
+        """Split data and normalize features"""
+        X_train, X_test, y_train, y_test = self.split(X, y)
+        X_train_scaled, X_test_scaled = self.normalize(X_train, X_test)
         return X_train_scaled, X_test_scaled, y_train, y_test
     
-    def train_models(self, X_train, y_train):
-        """Train multiple ML models"""
+    def train_models(self, X_train, y_train, n_jobs=N_JOBS, backend=BACKEND):
+        """
+        Train the candidate models, up to n_jobs at a time (1: one after
+        another). Models with their own thread pool share the remaining cores.
+        """
         
         print("\n" + "="*60)
         print("STEP 3: TRAINING MODELS")
         print("="*60)
         
-        print("\n[1/3] Logistic Regression...")
-        lr = LogisticRegression(random_state=42, max_iter=1000)
-        lr.fit(X_train, y_train)
-        self.models['Logistic Regression'] = lr
+        workers, threads = plan_workers(n_jobs, len(candidate_models(fast=self.fast)))
+        models = candidate_models(threads, self.fast)
+        print(f"Fitting {', '.join(models)} ({workers} at a time)...")
+        start = time.perf_counter()
+        fitted = Parallel(n_jobs=workers, backend=backend)(
+            delayed(_timed_fit)(model, X_train, np.asarray(y_train)) for model in models.values())
+        wall = time.perf_counter() - start
+        
+        rows = []
+        for name, (model, fit_sec, cpu_sec) in zip(models, fitted):
+            self.models[name] = model
+            self.results.setdefault(name, {}).update({'fit_sec': fit_sec, 'cpu_sec': cpu_sec})
+            rows.append((name, fit_sec, cpu_sec))
+        _print_timing(rows, wall, workers)
+        print("✓ All models trained")
+    
+    def cross_validate_models(self, X, y, folds=CV_FOLDS, n_jobs=N_JOBS, backend=BACKEND):
+        """
+        k-fold accuracy of every candidate model on unscaled training data
+        (from split()), grouped by self.train_groups when available. All
+        (model, fold) fits run as one batch of tasks so they spread over the cores.
+        """
         
-        print("\n[2/3] Random Forest...")
-        rf = RandomForestClassifier(n_estimators=100, max_depth=10, random_state=42, n_jobs=-1)
-        rf.fit(X_train, y_train)
-        self.models['Random Forest'] = rf
+        cv = GroupedCV(X, y, self.train_groups, folds)  # cv_splits caps folds at the number of groups
+        print("\n" + "="*60)
+        print(f"CROSS-VALIDATION ({len(cv.splits)}-fold{', grouped by ' + self.group_by if self.train_groups is not None else ''})")
+        print("="*60)
         
-        print("\n[3/3] Gradient Boosting...")
-        gb = GradientBoostingClassifier(n_estimators=100, max_depth=5, random_state=42)
-        gb.fit(X_train, y_train)
-        self.models['Gradient Boosting'] = gb
+        n_tasks = len(candidate_models(fast=self.fast)) * len(cv.splits)
+        workers, threads = plan_workers(n_jobs, n_tasks)
+        start = time.perf_counter()
+        scores = cv.evaluate(candidate_models(threads, self.fast), workers, backend)
+        wall = time.perf_counter() - start
         
-        print("✓ All models trained")
+        rows = []
+        for name, (acc, fit_sec, cpu_sec) in scores.items():
+            print(f"{name}: {acc.mean():.3f} ± {acc.std():.3f}")
+            self.results.setdefault(name, {}).update({'cv_acc': acc.mean(), 'cv_std': acc.std()})
+            rows.append((name, fit_sec.sum(), cpu_sec.sum()))
+        _print_timing(rows, wall, workers)
     
     def evaluate_models(self, X_train, X_test, y_train, y_test):
         """Evaluate all models"""
@@ -120,7 +376,8 @@ class EEGModelTrainer:
             print(classification_report(y_test, test_pred))
             
             cm = confusion_matrix(y_test, test_pred)
-            self.results[name] = {'train_acc': train_acc, 'test_acc': test_acc, 'confusion_matrix': cm}
+            self.results.setdefault(name, {}).update(
+                {'train_acc': train_acc, 'test_acc': test_acc, 'confusion_matrix': cm})
             
             self.plot_confusion_matrix(cm, name)
             
@@ -156,17 +413,35 @@ class EEGModelTrainer:
         joblib.dump(model, f'models/eeg_model_{model_name}.pkl')
         joblib.dump(self.scaler, f'models/eeg_scaler_{model_name}.pkl')
         joblib.dump(self.feature_names, f'models/eeg_features_{model_name}.pkl')
-        print(f"✓ Saved {model_name} model, scaler, and features")
+        if self.pipeline is not None:
+            self.pipeline.save(f'models/eeg_pipeline_{model_name}.json')
+        print(f"✓ Saved {model_name} model, scaler, features, and feature pipeline")
     
 def main():
-    trainer = EEGModelTrainer()
+    parser = argparse.ArgumentParser(description="Train EEG attention classifiers")
+    parser.add_argument("data", nargs="?", help=f"feature store or CSV (default: {FEATURE_STORE} "
+                                                f"if present, else {FEATURE_CSV})")
+    parser.add_argument("--jobs", type=int, default=N_JOBS,
+                        help="models/folds fitted at once (-1: one per core, 1: sequential)")
+    parser.add_argument("--cv", type=int, default=CV_FOLDS, help="cross-validation folds (0: skip)")
+    parser.add_argument("--backend", default=BACKEND, choices=['loky', 'multiprocessing', 'threading'])
+    parser.add_argument("--group-by", default=GROUP_BY, choices=['subject', 'recording', 'none'],
+                        help="keep each group's windows on one side of every split")
+    parser.add_argument("--fast", action="store_true",
+                        help="HistGradientBoosting instead of GradientBoosting, float32 features")
+    args = parser.parse_args()
+    
+    trainer = EEGModelTrainer(None if args.group_by == 'none' else args.group_by, args.fast)
     
-    X, y, feature_names = trainer.load_data()
+    X, y, feature_names = trainer.load_data(args.data)
     if X is None:
         return
     
-    X_train, X_test, y_train, y_test = trainer.split_and_normalize(X, y)
-    trainer.train_models(X_train, y_train)
+    X_train, X_test, y_train, y_test = trainer.split(X, y)
+    if args.cv > 1:
+        trainer.cross_validate_models(X_train, y_train, args.cv, args.jobs, args.backend)
+    X_train, X_test = trainer.normalize(X_train, X_test)
+    trainer.train_models(X_train, y_train, args.jobs, args.backend)
     trainer.evaluate_models(X_train, X_test, y_train, y_test)
     
     # Save the best model based on test accuracy